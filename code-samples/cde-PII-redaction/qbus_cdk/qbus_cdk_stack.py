@@ -11,30 +11,457 @@ from aws_cdk import (
     aws_s3 as s3,
     aws_lambda as lambda_,
     CfnParameter,
-    CfnTag,
     CfnOutput,
     # RemovalPolicy,
     aws_s3_deployment as s3deploy,
-    BundlingOptions,
-    DockerImage,
+    aws_ecr_assets as ecr_assets,
     Duration,
-    aws_s3_assets
+    aws_s3_assets,
+    ArnFormat,
+    AssetHashType,
+    Aws,
+    Fn,
+    Tags,
+    Token
 )
 from constructs import Construct
 
 
-class QbusCdkStack(Stack):
+_LAMBDA_SOURCE_DIR = "src/lambda"
 
-    def __init__(self, scope: Construct, construct_id: str, **kwargs) -> None:
-        super().__init__(scope, construct_id, **kwargs)
 
-        idc_instance_arn = CfnParameter(
-            self, 'idcInstanceArn',
-            type='String',
-            description='The ARN of the Identity Center instance'
-            )
+# IAM policy skeletons are built once at import. Account and region are
+# CloudFormation pseudo parameters resolved at deploy time; per-instance
+# values such as ${AppId}, ${KeyArn} and ${FunctionArn} are filled in by
+# _sub_policy.
+def _qbus_trust_conditions(source_arn):
+    """Trust conditions limiting qbusiness.amazonaws.com to applications in
+    this account whose ARN matches source_arn."""
+    return {
+        "StringEquals": {
+            "aws:SourceAccount": Aws.ACCOUNT_ID
+        },
+        "ArnLike": {
+            "aws:SourceArn": source_arn
+        }
+    }
+
+
+_QBUS_TRUST_CONDITIONS = _qbus_trust_conditions(
+    Fn.sub("arn:aws:qbusiness:${AWS::Region}:"
+           "${AWS::AccountId}:application/*"))
+
+_QBUS_TRUST_POLICY = {
+    "Version": "2012-10-17",
+    "Statement": [
+        {
+            "Sid": "AmazonQApplicationPermission",
+            "Effect": "Allow",
+            "Principal": {
+                "Service": "qbusiness.amazonaws.com"
+            },
+            "Action": "sts:AssumeRole",
+            "Condition": _QBUS_TRUST_CONDITIONS
+        }
+    ]
+}
+
+_QBUS_APP_POLICY = {
+    "Version": "2012-10-17",
+    "Statement": [
+        {
+            "Sid": "AmazonQApplicationPutMetricDataPermission",
+            "Effect": "Allow",
+            "Action": [
+                "cloudwatch:PutMetricData"
+            ],
+            "Resource": "*",
+            "Condition": {
+                "StringEquals": {
+                    "cloudwatch:namespace": "AWS/QBusiness"
+                }
+            }
+        },
+        {
+            "Sid": "AmazonQApplicationDescribeLogGroupsPermission",
+            "Effect": "Allow",
+            "Action": [
+                "logs:DescribeLogGroups"
+            ],
+            "Resource": "*"
+        },
+        {
+            "Sid": "AmazonQApplicationCreateLogGroupPermission",
+            "Effect": "Allow",
+            "Action": [
+                "logs:CreateLogGroup"
+            ],
+            "Resource": [
+                Fn.sub("arn:aws:logs:${AWS::Region}:${AWS::AccountId}:"
+                       "log-group:/aws/qbusiness/*")
+            ]
+        },
+        {
+            "Sid": "AmazonQApplicationLogStreamPermission",
+            "Effect": "Allow",
+            "Action": [
+                "logs:DescribeLogStreams",
+                "logs:CreateLogStream",
+                "logs:PutLogEvents"
+            ],
+            "Resource": [
+                Fn.sub("arn:aws:logs:${AWS::Region}:${AWS::AccountId}:"
+                       "log-group:/aws/qbusiness/*:log-stream:*")
+            ]
+        }
+    ]
+}
+
+_WEB_TRUST_CONDITIONS = {
+    "StringEquals": {
+        "aws:SourceAccount": Aws.ACCOUNT_ID
+    },
+    "ArnEquals": {
+        "aws:SourceArn": ("arn:aws:qbusiness:${AWS::Region}:"
+                          "${AWS::AccountId}:application/${AppId}")
+    }
+}
+
+_WEB_POLICY = {
+    "Version": "2012-10-17",
+    "Statement": [
+        {
+            "Sid": "QBusinessConversationPermissions",
+            "Effect": "Allow",
+            "Action": [
+                "qbusiness:Chat",
+                "qbusiness:ChatSync",
+                "qbusiness:ListMessages",
+                "qbusiness:ListConversations",
+                "qbusiness:PutFeedback",
+                "qbusiness:DeleteConversation",
+                "qbusiness:GetWebExperience",
+                "qbusiness:GetApplication",
+                "qbusiness:ListPlugins",
+                "qbusiness:ListPluginActions",
+                "qbusiness:GetChatControlsConfiguration",
+                "qbusiness:ListRetrievers",
+                "qbusiness:ListAttachments",
+                "qbusiness:GetMedia",
+                "qbusiness:DeleteAttachment"
+            ],
+            "Resource": ("arn:aws:qbusiness:${AWS::Region}:"
+                         "${AWS::AccountId}:application/${AppId}")
+        },
+        {
+            "Sid": "QBusinessPluginDiscoveryPermissions",
+            "Effect": "Allow",
+            "Action": [
+                "qbusiness:ListPluginTypeMetadata",
+                "qbusiness:ListPluginTypeActions"
+            ],
+            "Resource": "*"
+        },
+        {
+            "Sid": "QBusinessRetrieverPermission",
+            "Effect": "Allow",
+            "Action": [
+                "qbusiness:GetRetriever"
+            ],
+            "Resource": [
+                ("arn:aws:qbusiness:${AWS::Region}:"
+                 "${AWS::AccountId}:application/${AppId}"),
+                ("arn:aws:qbusiness:${AWS::Region}:"
+                 "${AWS::AccountId}:application/${AppId}/retriever/*")
+            ]
+        },
+        {
+            "Sid": "QBusinessKMSDecryptPermissions",
+            "Effect": "Allow",
+            "Action": [
+                "kms:Decrypt"
+            ],
+            "Resource": [
+                "${KeyArn}"
+            ],
+            "Condition": {
+                "StringLike": {
+                    "kms:ViaService": [
+                        "qbusiness.${AWS::Region}.amazonaws.com",
+                        "qapps.${AWS::Region}.amazonaws.com"
+                    ]
+                }
+            }
+        },
+        {
+            "Sid": "QBusinessSetContextPermissions",
+            "Effect": "Allow",
+            "Action": [
+                "sts:SetContext"
+            ],
+            "Resource": [
+                "arn:aws:sts::*:self"
+            ],
+            "Condition": {
+                "StringLike": {
+                    "aws:CalledViaLast": [
+                        "qbusiness.amazonaws.com",
+                        "qapps.amazonaws.com"
+                    ]
+                }
+            }
+        },
+        {
+            "Sid": "QAppsResourceAgnosticPermissions",
+            "Effect": "Allow",
+            "Action": [
+                "qapps:CreateQApp",
+                "qapps:PredictQApp",
+                "qapps:PredictProblemStatementFromConversation",
+                "qapps:PredictQAppFromProblemStatement",
+                "qapps:ListQApps",
+                "qapps:ListLibraryItems",
+                "qapps:CreateSubscriptionToken",
+                "qapps:ListCategories"
+            ],
+            "Resource": ("arn:aws:qbusiness:${AWS::Region}:"
+                         "${AWS::AccountId}:application/${AppId}")
+        },
+        {
+            "Sid": "QAppsAppUniversalPermissions",
+            "Effect": "Allow",
+            "Action": [
+                "qapps:DisassociateQAppFromUser"
+            ],
+            "Resource": ("arn:aws:qapps:${AWS::Region}:"
+                         "${AWS::AccountId}:application/${AppId}/qapp/*")
+        },
+        {
+            "Sid": "QAppsAppOwnerPermissions",
+            "Effect": "Allow",
+            "Action": [
+                "qapps:GetQApp",
+                "qapps:CopyQApp",
+                "qapps:UpdateQApp",
+                "qapps:DeleteQApp",
+                "qapps:ImportDocument",
+                "qapps:CreateLibraryItem",
+                "qapps:UpdateLibraryItem",
+                "qapps:StartQAppSession",
+                "qapps:DescribeQAppPermissions",
+                "qapps:UpdateQAppPermissions"
+            ],
+            "Resource": ("arn:aws:qapps:${AWS::Region}:"
+                         "${AWS::AccountId}:application/${AppId}/qapp/*"),
+            "Condition": {
+                "StringEqualsIgnoreCase": {
+                    "qapps:UserIsAppOwner": "true"
+                }
+            }
+        },
+        {
+            "Sid": "QAppsPublishedAppPermissions",
+            "Effect": "Allow",
+            "Action": [
+                "qapps:GetQApp",
+                "qapps:CopyQApp",
+                "qapps:AssociateQAppWithUser",
+                "qapps:GetLibraryItem",
+                "qapps:CreateLibraryItemReview",
+                "qapps:AssociateLibraryItemReview",
+                "qapps:DisassociateLibraryItemReview",
+                "qapps:StartQAppSession",
+                "qapps:DescribeQAppPermissions"
+            ],
+            "Resource": ("arn:aws:qapps:${AWS::Region}:"
+                         "${AWS::AccountId}:application/${AppId}/qapp/*"),
+            "Condition": {
+                "StringEqualsIgnoreCase": {
+                    "qapps:AppIsPublished": "true"
+                }
+            }
+        },
+        {
+            "Sid": "QAppsAppSessionModeratorPermissions",
+            "Effect": "Allow",
+            "Action": [
+                "qapps:ImportDocument",
+                "qapps:GetQAppSession",
+                "qapps:GetQAppSessionMetadata",
+                "qapps:UpdateQAppSession",
+                "qapps:UpdateQAppSessionMetadata",
+                "qapps:StopQAppSession",
+                "qapps:ListQAppSessionData",
+                "qapps:ExportQAppSessionData"
+            ],
+            "Resource": ("arn:aws:qapps:${AWS::Region}:${AWS::AccountId}:"
+                         "application/${AppId}/qapp/*/session/*"),
+            "Condition": {
+                "StringEqualsIgnoreCase": {
+                    "qapps:UserIsSessionModerator": "true"
+                }
+            }
+        },
+        {
+            "Sid": "QAppsSharedAppSessionPermissions",
+            "Effect": "Allow",
+            "Action": [
+                "qapps:ImportDocument",
+                "qapps:GetQAppSession",
+                "qapps:GetQAppSessionMetadata",
+                "qapps:UpdateQAppSession",
+                "qapps:ListQAppSessionData"
+            ],
+            "Resource": ("arn:aws:qapps:${AWS::Region}:${AWS::AccountId}:"
+                         "application/${AppId}/qapp/*/session/*"),
+            "Condition": {
+                "StringEqualsIgnoreCase": {
+                    "qapps:SessionIsShared": "true"
+                }
+            }
+        },
+        {
+            "Sid": "QBusToQuickSightGenerateEmbedUrlInvocation",
+            "Effect": "Allow",
+            "Action": [
+                "quicksight:GenerateEmbedUrlForRegisteredUserWithIdentity"
+            ],
+            "Resource": "*",
+            "Condition": {
+                "ForAllValues:StringLike": {
+                    "quicksight:AllowedEmbeddingDomains": [
+                        "https://*.chat.qbusiness.${AWS::Region}.on.aws/"
+                    ]
+                }
+            }
+        }
+    ]
+}
+
+_DATASOURCE_TRUST_CONDITIONS = _qbus_trust_conditions(
+    "arn:aws:qbusiness:${AWS::Region}:${AWS::AccountId}:application/${AppId}")
+
+
+_CDE_POLICY = {
+    "Version": "2012-10-17",
+    "Statement": [
+        {
+            "Action": [
+                "s3:GetObject",
+                "s3:PutObject",
+                "s3:DeleteObject"
+            ],
+            "Resource": [
+                "arn:aws:s3:::${CdeBucket}/*",
+                "arn:aws:s3:::${CdeBucket}"
+            ],
+            "Effect": "Allow"
+        },
+        {
+            "Action": "s3:ListBucket",
+            "Resource": ["arn:aws:s3:::${CdeBucket}"],
+            "Effect": "Allow"
+        },
+        {
+            "Action": "lambda:InvokeFunction",
+            "Resource": [
+                "${FunctionArn}",
+                "${FunctionArn}:*"
+            ],
+            "Effect": "Allow"
+        },
+        {
+            "Effect": "Allow",
+            "Action": [
+                "kms:Decrypt"
+            ],
+            "Resource": "${KeyArn}"
+        }
+    ]
+}
+
+
+def _sub_policy(template, variables):
+    """Return a copy of a policy template with every ``${...}`` string
+    wrapped in ``Fn::Sub`` against the given per-instance variables."""
+    if isinstance(template, dict):
+        return {k: _sub_policy(v, variables) for k, v in template.items()}
+    if isinstance(template, list):
+        return [_sub_policy(v, variables) for v in template]
+    if (isinstance(template, str) and "${" in template
+            and not Token.is_unresolved(template)):
+        used = {k: v for k, v in variables.items() if f"${{{k}}}" in template}
+        return Fn.sub(template, used) if used else Fn.sub(template)
+    return template
+
+
+def _build_s3_datasource_config(bucket_name):
+    """S3 connector configuration for the CDE test data source. The bucket
+    name is passed through as a token rather than formatted into a string."""
+    return {
+        "type": "S3",
+        "syncMode": "FORCED_FULL_CRAWL",
+        "connectionConfiguration": {
+            "repositoryEndpointMetadata": {
+                "BucketName": bucket_name
+            }
+        },
+        "repositoryConfigurations": {
+            "document": {
+                "fieldMappings": [
+                    {
+                        "dataSourceFieldName": "s3_document_id",
+                        "indexFieldName": "s3_document_id",
+                        "indexFieldType": "STRING"
+                    }
+                ]
+            }
+        },
+        "additionalProperties": {
+            "inclusionPatterns": ["*.pdf", "*.docx"],
+            "exclusionPatterns": ["*.tmp"],
+            # "inclusionPrefixes": ["/important-docs/"],
+            "exclusionPrefixes": ["/temporary/"],
+            # "aclConfigurationFilePath": "/configs/acl.json",
+            # "metadataFilesPrefix": "/metadata/",
+            # The S3 connector schema types these two as strings
+            "maxFileSizeInMegaBytes": "50",
+            "enableDeletionProtection": "false"
+        }
+    }
+
 
-        kms_key_id_ = self.create_kms_id()
+# Builds an ARN in the stack's partition, region and account
+def _arn(stack, service, resource, resource_name="*", account=None,
+         arn_format=ArnFormat.SLASH_RESOURCE_NAME):
+    return stack.format_arn(
+        service=service,
+        resource=resource,
+        resource_name=resource_name,
+        account=account,
+        arn_format=arn_format
+    )
+
+
+# Builds an S3 bucket or object ARN; S3 ARNs carry no region or account
+def _s3_arn(stack, bucket_name, key_pattern=None):
+    return stack.format_arn(
+        service="s3",
+        resource=bucket_name,
+        resource_name=key_pattern,
+        region="",
+        account="",
+        arn_format=(ArnFormat.SLASH_RESOURCE_NAME if key_pattern
+                    else ArnFormat.NO_RESOURCE_NAME)
+    )
+
+
+class QBusinessApp(Construct):
+    """Q Business application with its index, retriever and web experience."""
+
+    def __init__(self, scope: Construct, construct_id: str, *,
+                 idc_instance_arn: str, kms_key: kms.IKey) -> None:
+        super().__init__(scope, construct_id)
 
         # Creates a Q Business Application
         cfn_application = qbusiness.CfnApplication(
@@ -46,9 +473,9 @@ class QbusCdkStack(Stack):
             ),
             description="Q Business application deployed using CDK",
             # encryption_configuration=qbusiness.CfnApplication.EncryptionConfigurationProperty(
-            #     kms_key_id=kms_key_id_
+            #     kms_key_id=kms_key.key_id
             # ),
-            identity_center_instance_arn=idc_instance_arn.value_as_string,
+            identity_center_instance_arn=idc_instance_arn,
             personalization_configuration=qbusiness
             .CfnApplication.PersonalizationConfigurationProperty(
                 personalization_control_mode="ENABLED"
@@ -58,10 +485,6 @@ class QbusCdkStack(Stack):
                 q_apps_control_mode="ENABLED"
             ),
             role_arn=self.create_iam_role_qbus(),
-            tags=[CfnTag(
-                key="Environment",
-                value="Demo"
-            )]
         )
 
         # Creates an Index for the Q Business Application
@@ -81,13 +504,8 @@ class QbusCdkStack(Stack):
                     search="ENABLED",
                     type="STRING"
                     )],
-            tags=[CfnTag(
-                key="Environment",
-                value="Demo"
-            )],
             type="ENTERPRISE"
         )
-        cfn_index.add_dependency(cfn_application)
 
         # Creates a Retriver for the Q Business Application
         cfn_retriever = qbusiness.CfnRetriever(
@@ -104,12 +522,7 @@ class QbusCdkStack(Stack):
             display_name="QBusinessRetrieverCDK",
             type="NATIVE_INDEX",
             # role_arn="roleArn",
-            tags=[CfnTag(
-                key="Environment",
-                value="Demo"
-            )]
         )
-        cfn_retriever.add_dependency(cfn_index)
 
         # Creates the web experience for the Q Business Application
         cfn_web_experience = qbusiness.CfnWebExperience(
@@ -119,20 +532,88 @@ class QbusCdkStack(Stack):
             role_arn=self
             .create_iam_role_qbus_web(cfn_application
                                       .attr_application_id,
-                                      kms_key_id_
+                                      kms_key
                                       ),
             sample_prompts_control_mode="ENABLED",
             subtitle="Demostration of Q Business Features",
-            tags=[CfnTag(
-                key="Environment",
-                value="Demo"
-            )],
             title="Q Business Demo",
             welcome_message="I'm MARS, an AI assistant. "
             "I can help brainstorm ideas, summarize text, "
             "or answer from your company data."
         )
-        cfn_web_experience.add_dependency(cfn_application)
+
+        self.application = cfn_application
+        self.index = cfn_index
+        self.retriever = cfn_retriever
+        self.web_experience = cfn_web_experience
+
+    # Creates an IAM for Q Business Application
+    def create_iam_role_qbus(self):
+        iam_role = iam.Role(
+            self,
+            "QBusinessRoleCDK",
+            assumed_by=iam.ServicePrincipal(
+                "qbusiness.amazonaws.com",
+                conditions=_QBUS_TRUST_CONDITIONS
+            ),
+            description="Q Business Application IAM role from CDK",
+            path="/qbusiness/",
+            inline_policies={
+                "QBusinessRolePolicyCDK":
+                iam.PolicyDocument.from_json(_QBUS_APP_POLICY)
+            }
+        )
+
+        return iam_role.role_arn
+
+    # Creates an IAM role for Q Business Application Web Experience
+    def create_iam_role_qbus_web(self, app_id, kms_key):
+        variables = {"AppId": app_id, "KeyArn": kms_key.key_arn}
+        principal = iam.ServicePrincipal(
+            "application.qbusiness.amazonaws.com",
+            conditions=_sub_policy(_WEB_TRUST_CONDITIONS, variables)
+        )
+
+        iam_role = iam.Role(
+            self,
+            "QBusinessRoleWebCDK",
+            assumed_by=principal,
+            description="Q Bus Application Web Experience IAM role from CDK",
+            path="/qbusiness/"
+        )
+        # The web experience policy is close to the inline policy size
+        # limit, so it is kept as a standalone managed policy
+        iam_role.add_managed_policy(
+            iam.ManagedPolicy(
+                self,
+                "QBusinessWebManagedPolicy",
+                path="/qbusiness/",
+                document=iam.PolicyDocument.from_json(
+                    _sub_policy(_WEB_POLICY, variables))
+            )
+        )
+        # The web experience also sets the identity context on the session;
+        # policy minimization merges this into the sts:AssumeRole statement.
+        iam_role.assume_role_policy.add_statements(
+            iam.PolicyStatement(
+                actions=["sts:SetContext"],
+                principals=[principal]
+            )
+        )
+
+        return iam_role.role_arn
+
+
+class CDEPipeline(Construct):
+    """S3 data source whose documents pass through the CDE pre-extraction
+    Lambda before they are indexed."""
+
+    def __init__(self, scope: Construct, construct_id: str, *,
+                 application: qbusiness.CfnApplication,
+                 index: qbusiness.CfnIndex,
+                 kms_key: kms.IKey,
+                 provisioned_concurrency: int) -> None:
+        super().__init__(scope, construct_id)
 
         # Creates an S3 Bucket for Data Source
         data_bucket = s3.Bucket(
@@ -140,7 +621,6 @@ class QbusCdkStack(Stack):
             "MyBucket",
             # removal_policy=RemovalPolicy.DESTROY,
             # auto_delete_objects=True,
-            bucket_name="qbus-cde-data-cdk"
         )
 
         # Creates a BucketDeployment to upload the test document
@@ -148,10 +628,18 @@ class QbusCdkStack(Stack):
             self,
             "DeployDocument",
             sources=[
-                s3deploy.Source.asset("doc/")
+                s3deploy.Source.asset(
+                    "doc/",
+                    asset_hash_type=AssetHashType.SOURCE
+                )
             ],
-            destination_bucket=data_bucket
+            destination_bucket=data_bucket,
             # destinationKeyPrefix="/data/"
+            # The sample document is tiny, so the smallest handler memory
+            # keeps the custom resource's cold start short.
+            memory_limit=128,
+            prune=False,
+            retain_on_delete=False
         )
 
         # Creates a Bucket for CDE
@@ -160,58 +648,31 @@ class QbusCdkStack(Stack):
             "MyBucket1",
             # removal_policy=RemovalPolicy.DESTROY,
             # auto_delete_objects=True,
-            bucket_name="qbus-cde-cdk"
         )
 
-        # Creates the IAM role for CDE
-        cde_qbus_role = self.create_iam_role_qbus_cde(
-            kms_key_id_,
-            cde_bucket.bucket_name
+        # Creates the Layer, IAM Execution role and Lambda function for CDE
+        cde_function, cde_lambda = self.create_cde_lambda(
+            cde_bucket.bucket_name,
+            kms_key,
+            provisioned_concurrency
             )
 
-        # Creates the Layer, IAM Execution role and Lambda function for CDE
-        cde_lambda = self.create_cde_lambda(
+        # Creates the IAM role for CDE
+        cde_qbus_role = self.create_iam_role_qbus_cde(
+            kms_key,
             cde_bucket.bucket_name,
-            kms_key_id_
+            cde_function.function_arn
             )
 
         # Creates the S3 Data Source with CDE configuration
         cfn_data_source = qbusiness.CfnDataSource(
             self,
             "MyCfnDataSource",
-            application_id=cfn_application.attr_application_id,
-            configuration={
-                    "type": "S3",
-                    "syncMode": "FORCED_FULL_CRAWL",
-                    "connectionConfiguration": {
-                        "repositoryEndpointMetadata": {
-                            "BucketName": f"{data_bucket.bucket_name}"
-                        }
-                    },
-                    "repositoryConfigurations": {
-                        "document": {
-                            "fieldMappings": [
-                                {
-                                    "dataSourceFieldName": "s3_document_id",
-                                    "indexFieldName": "s3_document_id",
-                                    "indexFieldType": "STRING"
-                                }
-                            ]
-                        }
-                    },
-                    "additionalProperties": {
-                        "inclusionPatterns": ["*.pdf", "*.docx"],
-                        "exclusionPatterns": ["*.tmp"],
-                        # "inclusionPrefixes": ["/important-docs/"],
-                        "exclusionPrefixes": ["/temporary/"],
-                        # "aclConfigurationFilePath": "/configs/acl.json",
-                        # "metadataFilesPrefix": "/metadata/",
-                        "maxFileSizeInMegaBytes": "50",
-                        "enableDeletionProtection": "false"
-                    }
-                },
+            application_id=application.attr_application_id,
+            configuration=_build_s3_datasource_config(
+                data_bucket.bucket_name),
             display_name="S3DataSourceCDETestCDK",
-            index_id=cfn_index.attr_index_id,
+            index_id=index.attr_index_id,
             description="S3 Data Source to test CDE",
             document_enrichment_configuration=qbusiness
             .CfnDataSource.DocumentEnrichmentConfigurationProperty(
@@ -223,404 +684,28 @@ class QbusCdkStack(Stack):
                 )
             ),
             role_arn=self.create_iam_role_qbus_datasource(
-                kms_key_id_,
-                cfn_application.attr_application_id,
-                cfn_index.attr_index_id,
-                data_bucket.bucket_name
+                kms_key,
+                application.attr_application_id,
+                index.attr_index_id,
+                data_bucket,
+                cde_function.function_arn
                 ),
             # sync_schedule="syncSchedule",
-            tags=[CfnTag(
-                key="Environment",
-                value="Demo"
-            )],
             # vpc_configuration=qbusiness.CfnDataSource.DataSourceVpcConfigurationProperty(
             #     security_group_ids=["securityGroupIds"],
             #     subnet_ids=["subnetIds"]
             # )
         )
-
-        CfnOutput(self, "DataSourceARN",
-                  value=cfn_data_source.attr_data_source_arn)
-
-    # Creates a KMS key to encrypt Q Business Application
-    def create_kms_id(self):
-        kms_key = kms.Key(self, "KMSKey")
-        return kms_key.key_id
-
-    # Creates an IAM for Q Business Application
-    def create_iam_role_qbus(self):
-        assume_role_policy_document = {
-                "Version": "2012-10-17",
-                "Statement": [
-                    {
-                        "Sid": "AmazonQApplicationPermission",
-                        "Effect": "Allow",
-                        "Principal": {
-                            "Service": "qbusiness.amazonaws.com"
-                        },
-                        "Action": "sts:AssumeRole",
-                        "Condition": {
-                            "StringEquals": {
-                                "aws:SourceAccount": f"{self.account}"
-                            },
-                            "ArnLike": {
-                                "aws:SourceArn": (
-                                    f"arn:aws:qbusiness:{self.region}:"
-                                    f"{self.account}:application/*")
-                            }
-                        }
-                    }
-                ]
-                }
-
-        policy_document = {
-                "Version": "2012-10-17",
-                "Statement": [{
-                        "Sid": "AmazonQApplicationPutMetricDataPermission",
-                        "Effect": "Allow",
-                        "Action": [
-                            "cloudwatch:PutMetricData"
-                        ],
-                        "Resource": "*",
-                        "Condition": {
-                            "StringEquals": {
-                                "cloudwatch:namespace": "AWS/QBusiness"
-                            }
-                        }
-                    },
-                    {
-                        "Sid": "AmazonQApplicationDescribeLogGroupsPermission",
-                        "Effect": "Allow",
-                        "Action": [
-                            "logs:DescribeLogGroups"
-                        ],
-                        "Resource": "*"
-                    },
-                    {
-                        "Sid": "AmazonQApplicationCreateLogGroupPermission",
-                        "Effect": "Allow",
-                        "Action": [
-                            "logs:CreateLogGroup"
-                        ],
-                        "Resource": [
-                            (f"arn:aws:logs:{self.region}:"
-                             f"{self.account}:log-group:/aws/qbusiness/*")
-                        ]
-                    },
-                    {
-                        "Sid": "AmazonQApplicationLogStreamPermission",
-                        "Effect": "Allow",
-                        "Action": [
-                            "logs:DescribeLogStreams",
-                            "logs:CreateLogStream",
-                            "logs:PutLogEvents"
-                        ],
-                        "Resource": [
-                            (f"arn:aws:logs:{self.region}:"
-                             f"{self.account}:log-group:"
-                             "/aws/qbusiness/*:log-stream:*")
-                        ]
-                    }
-                ]
-            }
-
-        iam_role = iam.CfnRole(
-            self,
-            "QBusinessRoleCDK",
-            assume_role_policy_document=assume_role_policy_document,
-            description="Q Business Application IAM role from CDK",
-            path="/qbusiness/",
-            policies=[iam.CfnRole.PolicyProperty(
-                policy_document=policy_document,
-                policy_name="QBusinessRolePolicyCDK"
-            )],
-            role_name="QBusinessRoleCDK",
-            tags=[CfnTag(
-                key="Environment",
-                value="Demo"
-            )]
-        )
-
-        return iam_role.attr_arn
-
-    # Creates an IAM role for Q Business Application Web Experience
-    def create_iam_role_qbus_web(self, app_id, key_id):
-        assume_role_policy_document = {
-                "Version": "2012-10-17",
-                "Statement": [
-                    {
-                        "Sid": "QBusinessTrustPolicy",
-                        "Effect": "Allow",
-                        "Principal": {
-                            "Service": "application.qbusiness.amazonaws.com"
-                        },
-                        "Action": [
-                            "sts:AssumeRole",
-                            "sts:SetContext"
-                        ],
-                        "Condition": {
-                            "StringEquals": {
-                                "aws:SourceAccount": f"{self.account}"
-                                },
-                            "ArnEquals": {
-                                "aws:SourceArn": (f"arn:aws:qbusiness:"
-                                                  f"{self.region}:"
-                                                  f"{self.account}:"
-                                                  f"application/{app_id}")
-                            }
-                        }
-                    }
-                ]
-                }
-
-        policy_document = {
-                "Version": "2012-10-17",
-                "Statement": [{
-                        "Sid": "QBusinessConversationPermissions",
-                        "Effect": "Allow",
-                        "Action": [
-                            "qbusiness:Chat",
-                            "qbusiness:ChatSync",
-                            "qbusiness:ListMessages",
-                            "qbusiness:ListConversations",
-                            "qbusiness:PutFeedback",
-                            "qbusiness:DeleteConversation",
-                            "qbusiness:GetWebExperience",
-                            "qbusiness:GetApplication",
-                            "qbusiness:ListPlugins",
-                            "qbusiness:ListPluginActions",
-                            "qbusiness:GetChatControlsConfiguration",
-                            "qbusiness:ListRetrievers",
-                            "qbusiness:ListAttachments",
-                            "qbusiness:GetMedia",
-                            "qbusiness:DeleteAttachment"
-                        ],
-                        "Resource": (f"arn:aws:qbusiness:"
-                                     f"{self.region}:"
-                                     f"{self.account}:application/{app_id}")
-                    },
-                    {
-                        "Sid": "QBusinessPluginDiscoveryPermissions",
-                        "Effect": "Allow",
-                        "Action": [
-                            "qbusiness:ListPluginTypeMetadata",
-                            "qbusiness:ListPluginTypeActions"
-                        ],
-                        "Resource": "*"
-                    },
-                    {
-                        "Sid": "QBusinessRetrieverPermission",
-                        "Effect": "Allow",
-                        "Action": [
-                            "qbusiness:GetRetriever"
-                        ],
-                        "Resource": [
-                            (f"arn:aws:qbusiness:"
-                             f"{self.region}:"
-                             f"{self.account}:"
-                             f"application/{app_id}"),
-                            (f"arn:aws:qbusiness:"
-                             f"{self.region}:{self.account}:"
-                             f"application/{app_id}/retriever/*")
-                        ]
-                    },
-                    {
-                        "Sid": "QBusinessKMSDecryptPermissions",
-                        "Effect": "Allow",
-                        "Action": [
-                            "kms:Decrypt"
-                        ],
-                        "Resource": [
-                            (f"arn:aws:kms:"
-                             f"{self.region}:"
-                             f"{self.account}:key/{key_id}")
-                        ],
-                        "Condition": {
-                            "StringLike": {
-                                "kms:ViaService": [
-                                    f"qbusiness.{self.region}.amazonaws.com",
-                                    f"qapps.{self.region}.amazonaws.com"
-                                ]
-                            }
-                        }
-                    },
-                    {
-                        "Sid": "QBusinessSetContextPermissions",
-                        "Effect": "Allow",
-                        "Action": [
-                            "sts:SetContext"
-                        ],
-                        "Resource": [
-                            "arn:aws:sts::*:self"
-                        ],
-                        "Condition": {
-                            "StringLike": {
-                                "aws:CalledViaLast": [
-                                    "qbusiness.amazonaws.com",
-                                    "qapps.amazonaws.com"
-                                ]
-                            }
-                        }
-                    },
-                    {
-                        "Sid": "QAppsResourceAgnosticPermissions",
-                        "Effect": "Allow",
-                        "Action": [
-                            "qapps:CreateQApp",
-                            "qapps:PredictQApp",
-                            "qapps:PredictProblemStatementFromConversation",
-                            "qapps:PredictQAppFromProblemStatement",
-                            "qapps:ListQApps",
-                            "qapps:ListLibraryItems",
-                            "qapps:CreateSubscriptionToken",
-                            "qapps:ListCategories"
-                        ],
-                        "Resource": (f"arn:aws:qbusiness:"
-                                     f"{self.region}:"
-                                     f"{self.account}:"
-                                     f"application/{app_id}")
-                    },
-                    {
-                        "Sid": "QAppsAppUniversalPermissions",
-                        "Effect": "Allow",
-                        "Action": [
-                            "qapps:DisassociateQAppFromUser"
-                        ],
-                        "Resource": (f"arn:aws:qapps:"
-                                     f"{self.region}:"
-                                     f"{self.account}:"
-                                     f"application/{app_id}/qapp/*")
-                    },
-                    {
-                        "Sid": "QAppsAppOwnerPermissions",
-                        "Effect": "Allow",
-                        "Action": [
-                            "qapps:GetQApp",
-                            "qapps:CopyQApp",
-                            "qapps:UpdateQApp",
-                            "qapps:DeleteQApp",
-                            "qapps:ImportDocument",
-                            "qapps:CreateLibraryItem",
-                            "qapps:UpdateLibraryItem",
-                            "qapps:StartQAppSession",
-                            "qapps:DescribeQAppPermissions",
-                            "qapps:UpdateQAppPermissions"
-                        ],
-                        "Resource": (f"arn:aws:qapps:"
-                                     f"{self.region}:"
-                                     f"{self.account}:"
-                                     f"application/{app_id}/qapp/*"),
-                        "Condition": {
-                            "StringEqualsIgnoreCase": {
-                                "qapps:UserIsAppOwner": "true"
-                            }
-                        }
-                    },
-                    {
-                        "Sid": "QAppsPublishedAppPermissions",
-                        "Effect": "Allow",
-                        "Action": [
-                            "qapps:GetQApp",
-                            "qapps:CopyQApp",
-                            "qapps:AssociateQAppWithUser",
-                            "qapps:GetLibraryItem",
-                            "qapps:CreateLibraryItemReview",
-                            "qapps:AssociateLibraryItemReview",
-                            "qapps:DisassociateLibraryItemReview",
-                            "qapps:StartQAppSession",
-                            "qapps:DescribeQAppPermissions"
-                        ],
-                        "Resource": (f"arn:aws:qapps:"
-                                     f"{self.region}:"
-                                     f"{self.account}:"
-                                     f"application/{app_id}/qapp/*"),
-                        "Condition": {
-                            "StringEqualsIgnoreCase": {
-                                "qapps:AppIsPublished": "true"
-                            }
-                        }
-                    },
-                    {
-                        "Sid": "QAppsAppSessionModeratorPermissions",
-                        "Effect": "Allow",
-                        "Action": [
-                            "qapps:ImportDocument",
-                            "qapps:GetQAppSession",
-                            "qapps:GetQAppSessionMetadata",
-                            "qapps:UpdateQAppSession",
-                            "qapps:UpdateQAppSessionMetadata",
-                            "qapps:StopQAppSession",
-                            "qapps:ListQAppSessionData",
-                            "qapps:ExportQAppSessionData"
-                        ],
-                        "Resource": (f"arn:aws:qapps:{self.region}:"
-                                     f"{self.account}:"
-                                     f"application/{app_id}/qapp/*/session/*"),
-                        "Condition": {
-                            "StringEqualsIgnoreCase": {
-                                "qapps:UserIsSessionModerator": "true"
-                            }
-                        }
-                    },
-                    {
-                        "Sid": "QAppsSharedAppSessionPermissions",
-                        "Effect": "Allow",
-                        "Action": [
-                            "qapps:ImportDocument",
-                            "qapps:GetQAppSession",
-                            "qapps:GetQAppSessionMetadata",
-                            "qapps:UpdateQAppSession",
-                            "qapps:ListQAppSessionData"
-                        ],
-                        "Resource": (f"arn:aws:qapps:{self.region}:"
-                                     f"{self.account}:"
-                                     f"application/{app_id}/qapp/*/session/*"),
-                        "Condition": {
-                            "StringEqualsIgnoreCase": {
-                                "qapps:SessionIsShared": "true"
-                            }
-                        }
-                    },
-                    {
-                        "Sid": "QBusToQuickSightGenerateEmbedUrlInvocation",
-                        "Effect": "Allow",
-                        "Action":
-                        ["quicksight:"
-                         "GenerateEmbedUrlForRegisteredUserWithIdentity"],
-                        "Resource": "*",
-                        "Condition": {
-                            "ForAllValues:StringLike": {
-                                "quicksight:AllowedEmbeddingDomains": [
-                                    (f"https://*.chat.qbusiness."
-                                     f"{self.region}.on.aws/")
-                                ]
-                            }
-                        }
-                    }
-                ]
-            }
-
-        iam_role = iam.CfnRole(
-            self,
-            "QBusinessRoleWebCDK",
-            assume_role_policy_document=assume_role_policy_document,
-            description="Q Bus Application Web Experience IAM role from CDK",
-            path="/qbusiness/",
-            policies=[iam.CfnRole.PolicyProperty(
-                policy_document=policy_document,
-                policy_name="QBusinessWebRolePolicyCDK"
-            )],
-            role_name="QBusinessWebRoleCDK",
-            tags=[CfnTag(
-                key="Environment",
-                value="Demo"
-            )]
-        )
-
-        return iam_role.attr_arn
+        self.data_bucket = data_bucket
+        self.data_source = cfn_data_source
 
     # Creates the Lambda layer, IAM execution role and Lambda function for CDE
-    def create_cde_lambda(self, cde_bucket, key_id):
+    def create_cde_lambda(self, cde_bucket, kms_key,
+                          provisioned_concurrency):
+        stack = Stack.of(self)
+        cde_bucket_arn = _s3_arn(stack, cde_bucket)
+        cde_objects_arn = _s3_arn(stack, cde_bucket, "*")
+
         cde_lambda_role = iam.Role(
             self,
             "CDELambdaRoleCDK",
@@ -639,273 +724,186 @@ class QbusCdkStack(Stack):
                                 actions=["s3:GetObject",
                                          "s3:PutObject",
                                          "s3:DeleteObject"],
-                                resources=[
-                                           f"arn:aws:s3:::{cde_bucket}",
-                                           f"arn:aws:s3:::{cde_bucket}/*"
-                                          ]
+                                resources=[cde_bucket_arn, cde_objects_arn]
                             ),
                             iam.PolicyStatement(
                                 actions=["s3:ListBucket"],
-                                resources=[
-                                        f"arn:aws:s3:::{cde_bucket}"
-                                          ]
-                            ),
-                            iam.PolicyStatement(
-                                actions=["kms:Decrypt"],
-                                resources=[
-                                        (f"arn:aws:kms:"
-                                         f"{self.region}:{self.account}:"
-                                         f"key/{key_id}")
-                                          ]
+                                resources=[cde_bucket_arn]
                             ),
                             iam.PolicyStatement(
                                 actions=["bedrock:InvokeModel",
                                          "bedrock:"
                                          "InvokeModelWithResponseStream"],
                                 resources=[
-                                        (f"arn:aws:bedrock:"
-                                         f"{self.region}::"
-                                         f"foundation-model/*")
+                                        _arn(stack, "bedrock",
+                                             "foundation-model", account="")
                                           ]
                             )
                                 ]
                             )
                     },
-            path="/qbusiness/",
-            role_name="CDELambdaRoleCDK"
+            path="/qbusiness/"
         )
+        kms_key.grant_decrypt(cde_lambda_role)
 
-        cde_lambda = lambda_.Function(
+        cde_lambda = lambda_.DockerImageFunction(
             self,
             "cde-lambda",
-            handler="cde_lambda.lambda_handler",
-            runtime=lambda_.Runtime.PYTHON_3_13,
-            code=lambda_.Code.from_asset(
-                "src//lambda",
-                bundling=BundlingOptions(
-                    image=DockerImage.from_registry("public.ecr.aws/sam/build-python3.13"),
-                    platform="linux/amd64",
-                    command=[
-                        "bash", "-c",
-                        "pip3 install -r requirements.txt -t /asset-output && cp -au . /asset-output"
-                    ]
-                )
+            code=lambda_.DockerImageCode.from_image_asset(
+                _LAMBDA_SOURCE_DIR,
+                platform=ecr_assets.Platform.LINUX_AMD64,
+                exclude=["**/*.pyc", "**/__pycache__", "**/tests"]
             ),
             role=cde_lambda_role,
-            function_name="pre-extraction-lambda-function-cdk",
+            # 1769 MB is the point where Lambda allocates one full vCPU
+            memory_size=1769,
             timeout=Duration.seconds(120),
             retry_attempts=0
             )
 
+        # Q Business invokes the function inline during a sync, so keep warm
+        # execution environments behind an alias to avoid cold starts there
+        cde_lambda_alias = lambda_.Alias(
+            self,
+            "cde-lambda-prod",
+            alias_name="prod",
+            version=cde_lambda.current_version
+        )
+        # The count is a CfnParameter token, which Alias would validate as a
+        # plain number during synth, so it is set on the CfnAlias directly
+        cde_lambda_alias.node.default_child.add_property_override(
+            "ProvisionedConcurrencyConfig.ProvisionedConcurrentExecutions",
+            provisioned_concurrency
+        )
+
         lambda_.CfnPermission(
             self,
             "qbus-permission-on-cde-lambda",
             action="lambda:InvokeFunction",
-            function_name=cde_lambda.function_name,
+            function_name=cde_lambda_alias.function_arn,
             principal="qbusiness.amazonaws.com")
 
-        return cde_lambda.function_arn
+        return cde_lambda, cde_lambda_alias.function_arn
 
     # Creates the IAM role for Q Business Data Source
     def create_iam_role_qbus_datasource(self,
-                                        key_id,
+                                        kms_key,
                                         app_id,
                                         index_id,
-                                        data_bucket):
-        assume_role_policy_document = {
-                "Version": "2012-10-17",
-                "Statement": [
-                    {
-                        "Sid": "AmazonQApplicationPermission",
-                        "Effect": "Allow",
-                        "Principal": {
-                            "Service": "qbusiness.amazonaws.com"
-                        },
-                        "Action": "sts:AssumeRole",
-                        "Condition": {
-                            "StringEquals": {
-                                "aws:SourceAccount": f"{self.account}"
-                            },
-                            "ArnLike": {
-                                "aws:SourceArn": (f"arn:aws:qbusiness:"
-                                                  f"{self.region}:"
-                                                  f"{self.account}:"
-                                                  f"application/{app_id}")
-                            }
-                        }
-                    }
-                ]
-                }
-
-        policy_document = {
-            "Version": "2012-10-17",
-            "Statement": [
-                {
-                    "Effect": "Allow",
-                    "Action": [
-                        "s3:GetObject"
-                    ],
-                    "Resource": [f"arn:aws:s3:::{data_bucket}/*"],
-                    "Condition": {
-                        "StringEquals": {
-                            "aws:ResourceAccount": f"{self.account}"
-                        }
-                    }
-                },
-                {
-                    "Effect": "Allow",
-                    "Action": [
-                        "s3:ListBucket"
-                    ],
-                    "Resource": [f"arn:aws:s3:::{data_bucket}"],
-                    "Condition": {
-                        "StringEquals": {
-                            "aws:ResourceAccount": f"{self.account}"
-                        }
-                    }
-                },
-                {
-                    "Effect": "Allow",
-                    "Action": [
-                        "qbusiness:BatchPutDocument",
-                        "qbusiness:BatchDeleteDocument",
-                        "qbusiness:PutGroup",
-                        "qbusiness:CreateUser",
-                        "qbusiness:DeleteGroup",
-                        "qbusiness:UpdateUser",
-                        "qbusiness:ListGroups"
-                    ],
-                    "Resource": [
-                        (f"arn:aws:qbusiness:"
-                         f"{self.region}:{self.account}:"
-                         f"application/{app_id}"),
-                        (f"arn:aws:qbusiness:{self.region}:"
-                         f"{self.account}:application/{app_id}"
-                         f"/index/{index_id}"),
-                        (f"arn:aws:qbusiness:{self.region}:"
-                         f"{self.account}:application/{app_id}"
-                         f"/index/{index_id}/data-source/*")
-                    ]
-                },
-                {
-                    "Effect": "Allow",
-                    "Action": [
-                        "kms:Decrypt"
-                    ],
-                    "Resource": (f"arn:aws:kms:{self.region}:"
-                                 f"{self.account}:key/{key_id}")
-                },
-                {
-                    "Effect": "Allow",
-                    "Action": [
-                        "lambda:InvokeFunction"
-                    ],
-                    "Resource": "*"
-                }
-            ]
-        }
-
-        iam_role = iam.CfnRole(
+                                        data_bucket,
+                                        function_arn):
+        stack = Stack.of(self)
+        app_arn = _arn(stack, "qbusiness", "application", app_id)
+        index_path = app_id + "/index/" + index_id
+        index_arn = _arn(stack, "qbusiness", "application", index_path)
+        data_source_arn = _arn(stack, "qbusiness", "application",
+                               index_path + "/data-source/*")
+
+        iam_role = iam.Role(
             self,
             "QBusinessRoleDataSourceS3CDK",
-            assume_role_policy_document=assume_role_policy_document,
+            assumed_by=iam.ServicePrincipal(
+                "qbusiness.amazonaws.com",
+                conditions=_sub_policy(_DATASOURCE_TRUST_CONDITIONS,
+                                       {"AppId": app_id})
+            ),
             description="Q Bus Application S3 Data Source IAM role from CDK",
-            path="/qbusiness/",
-            policies=[iam.CfnRole.PolicyProperty(
-                policy_document=policy_document,
-                policy_name="QBusinessRoleS3DataSourcePolicyCDK"
-            )],
-            role_name="QBusinessS3DataSourceRoleCDK",
-            tags=[CfnTag(
-                key="Environment",
-                value="Demo"
-            )]
+            path="/qbusiness/"
         )
-
-        return iam_role.attr_arn
-
-    # Creates the IAM role for CDE
-    def create_iam_role_qbus_cde(self, key_id, cde_bucket):
-        assume_role_policy_document = {
-                "Version": "2012-10-17",
-                "Statement": [
-                    {
-                        "Sid": "AmazonQApplicationPermission",
-                        "Effect": "Allow",
-                        "Principal": {
-                            "Service": "qbusiness.amazonaws.com"
-                        },
-                        "Action": "sts:AssumeRole",
-                        "Condition": {
-                            "StringEquals": {
-                                "aws:SourceAccount": f"{self.account}"
-                            },
-                            "ArnLike": {
-                                "aws:SourceArn": (f"arn:aws:qbusiness:"
-                                                  f"{self.region}:"
-                                                  f"{self.account}:"
-                                                  f"application/*")
-                            }
-                        }
+        data_bucket.grant_read(iam_role)
+        kms_key.grant_decrypt(iam_role)
+        iam_role.add_to_policy(
+            iam.PolicyStatement(
+                actions=[
+                    "qbusiness:BatchPutDocument",
+                    "qbusiness:BatchDeleteDocument",
+                    "qbusiness:PutGroup",
+                    "qbusiness:CreateUser",
+                    "qbusiness:DeleteGroup",
+                    "qbusiness:UpdateUser",
+                    "qbusiness:ListGroups"
+                ],
+                resources=[app_arn, index_arn, data_source_arn]
+            )
+        )
+        iam_role.add_to_policy(
+            iam.PolicyStatement(
+                actions=["lambda:InvokeFunction"],
+                resources=[function_arn, function_arn + ":*"],
+                conditions={
+                    "StringEquals": {
+                        "aws:ResourceAccount": Aws.ACCOUNT_ID
                     }
-                ]
                 }
+            )
+        )
 
-        policy_document = {
-            "Version": "2012-10-17",
-            "Statement": [
-                {
-                    "Action": [
-                        "s3:GetObject",
-                        "s3:PutObject",
-                        "s3:DeleteObject"
-                    ],
-                    "Resource": [
-                        f"arn:aws:s3:::{cde_bucket}/*",
-                        f"arn:aws:s3:::{cde_bucket}"
-                    ],
-                    "Effect": "Allow"
-                },
-                {
-                    "Action": "s3:ListBucket",
-                    "Resource": [f"arn:aws:s3:::{cde_bucket}"],
-                    "Effect": "Allow"
-                },
-                {
-                    "Action": "lambda:InvokeFunction",
-                    "Resource": [
-                        (f"arn:aws:lambda:"
-                         f"{self.region}:{self.account}:"
-                         f"function:pre-extraction-lambda-function-cdk")],
-                    "Effect": "Allow"
-                },
-                {
-                    "Effect": "Allow",
-                    "Action": [
-                        "kms:Decrypt"
-                    ],
-                    "Resource": (f"arn:aws:kms:"
-                                 f"{self.region}:"
-                                 f"{self.account}:key/{key_id}")
-                },
-            ]
-        }
+        return iam_role.role_arn
 
+    # Creates the IAM role for CDE
+    def create_iam_role_qbus_cde(self, kms_key, cde_bucket, function_arn):
         iam_role = iam.CfnRole(
             self,
             "QBusinessRoleCDECDK",
-            assume_role_policy_document=assume_role_policy_document,
+            assume_role_policy_document=_QBUS_TRUST_POLICY,
             description="Q Bus Application S3 Data Source IAM role from CDK",
             path="/qbusiness/",
             policies=[iam.CfnRole.PolicyProperty(
-                policy_document=policy_document,
+                policy_document=_sub_policy(
+                    _CDE_POLICY,
+                    {"CdeBucket": cde_bucket, "KeyArn": kms_key.key_arn,
+                     "FunctionArn": function_arn}),
                 policy_name="QBusiness-preextraction-policy"
-            )],
-            role_name="CDEQbusRoleCDK",
-            tags=[CfnTag(
-                key="Environment",
-                value="Demo"
             )]
         )
 
         return iam_role.attr_arn
+
+
+class QbusCdkStack(Stack):
+
+    def __init__(self, scope: Construct, construct_id: str, **kwargs) -> None:
+        super().__init__(scope, construct_id, **kwargs)
+
+        idc_instance_arn = CfnParameter(
+            self, 'idcInstanceArn',
+            type='String',
+            description='The ARN of the Identity Center instance'
+            )
+
+        provisioned_concurrency = CfnParameter(
+            self, 'provisionedConcurrency',
+            type='Number',
+            default=2,
+            min_value=1,
+            description='Provisioned concurrency for the CDE Lambda alias'
+            )
+
+        kms_key = self.create_kms_key()
+
+        qbus_app = QBusinessApp(
+            self,
+            "QBusinessApp",
+            idc_instance_arn=idc_instance_arn.value_as_string,
+            kms_key=kms_key
+        )
+
+        cde_pipeline = CDEPipeline(
+            self,
+            "CDEPipeline",
+            application=qbus_app.application,
+            index=qbus_app.index,
+            kms_key=kms_key,
+            provisioned_concurrency=provisioned_concurrency.value_as_number
+        )
+
+        CfnOutput(self, "DataSourceARN",
+                  value=cde_pipeline.data_source.attr_data_source_arn)
+        CfnOutput(self, "DataBucketName",
+                  value=cde_pipeline.data_bucket.bucket_name)
+
+        Tags.of(self).add("Environment", "Demo")
+
+    # Creates a KMS key to encrypt Q Business Application
+    def create_kms_key(self):
+        return kms.Key(self, "KMSKey", enable_key_rotation=True)
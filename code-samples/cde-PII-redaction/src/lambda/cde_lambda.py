@@ -3,21 +3,36 @@
 
 
 import boto3
+from botocore.config import Config
 import logging
-import json
-from PyPDF2 import PdfReader
-import io
+import orjson
+import tempfile
+from pypdfium2 import PdfDocument
 
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-s3_client = boto3.client('s3')
-bedrock_runtime = boto3.client('bedrock-runtime')
+# Clients are built once per execution environment and keep their
+# connections alive between warm invocations
+client_config = Config(
+    retries={"mode": "adaptive", "max_attempts": 3},
+    tcp_keepalive=True,
+    max_pool_connections=20,
+    connect_timeout=2,
+    read_timeout=30
+)
+session = boto3.session.Session()
+s3_client = session.client('s3', config=client_config)
+bedrock_runtime = session.client('bedrock-runtime', config=client_config)
+
+# PDFs up to this size are parsed from memory; larger ones spill to /tmp
+PDF_SPOOL_MAX_SIZE = 8 * 1024 * 1024
 
 
 def lambda_handler(event, context):
-    logger.info("Received event: %s", json.dumps(event))
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("Received event: %s", orjson.dumps(event).decode())
     # Get the value of "S3Bucket" key name
     s3_bucket = event.get("s3Bucket")
     # Get the value of "S3ObjectKey" key name
@@ -35,7 +50,7 @@ def lambda_handler(event, context):
 
     s3_client.put_object(Bucket=s3_bucket,
                          Key=new_key,
-                         Body=bedrock_response.encode('utf-8'))
+                         Body=bedrock_response)
 
     return {
         "version": "v0",
@@ -46,16 +61,22 @@ def lambda_handler(event, context):
 
 def read_pdf_from_s3(bucket_name, file_key):
     try:
-        # Get the PDF file from S3
-        response = s3_client.get_object(Bucket=bucket_name, Key=file_key)
-        pdf_file = io.BytesIO(response['Body'].read())
-
-        # Read PDF content
-        pdf_reader = PdfReader(pdf_file)
-        text = ""
-        for page in pdf_reader.pages:
-            text += page.extract_text()
-        return text
+        with tempfile.SpooledTemporaryFile(
+                max_size=PDF_SPOOL_MAX_SIZE) as pdf_file:
+            # Get the PDF file from S3
+            s3_client.download_fileobj(bucket_name, file_key, pdf_file)
+            pdf_file.seek(0)
+            pdf = PdfDocument(pdf_file)
+
+            # Read PDF content
+            try:
+                parts = []
+                for page in pdf:
+                    # Image-only pages have no text layer
+                    parts.append(page.get_textpage().get_text_range() or "")
+                return "".join(parts)
+            finally:
+                pdf.close()
     except Exception as e:
         print(f"Error reading PDF from S3: {str(e)}")
         return None
@@ -63,37 +84,30 @@ def read_pdf_from_s3(bucket_name, file_key):
 
 def invoke_bedrock_model(text_content, model_id="amazon.nova-micro-v1:0"):
     try:
-        # Prepare the request body
-        request_body = {
-                "inferenceConfig": {
-                    "max_new_tokens": 1000
-                },
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "text": (
-                                    f"Remove the SSN,"
-                                    f"Date of Birth from this text: {text_content}"
-                                ) 
-                            }
-                        ]
-                    }
-                ]
-            }
-
         # Invoke the model
-        response = bedrock_runtime.invoke_model(
+        response = bedrock_runtime.converse(
             modelId=model_id,
-            body=json.dumps(request_body),
-            contentType="application/json",
-            accept="application/json"
+            messages=[
+                {
+                    "role": "user",
+                    "content": [
+                        {
+                            "text": (
+                                f"Remove the SSN,"
+                                f"Date of Birth from this text: {text_content}"
+                            )
+                        }
+                    ]
+                }
+            ],
+            inferenceConfig={
+                "maxTokens": 1000
+            }
         )
-        # Parse and return the response
-        response_body = json.loads(response['body'].read())
-        logger.info("Response from Bedrock model: %s", response_body)
-        return response_body['output']['message']['content'][0]['text']
+        # Return the response text, encoded once for the S3 upload
+        logger.info("Response from Bedrock model: %s", response['output'])
+        return response['output']['message']['content'][0]['text'].encode(
+            'utf-8')
     except Exception as e:
         print(f"Error invoking Bedrock model: {str(e)}")
         return None
@@ -8,10 +8,28 @@ import re
 import logging
 import ssl
 import base64
+import time
+import urllib3
+from botocore.config import Config
 from botocore.exceptions import ClientError
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import List, Dict
-from urllib import request, parse, error
+from urllib import parse
+from urllib3.util.retry import Retry
+
+# Use orjson for ServiceNow responses and Lambda output when it is bundled
+# with the function
+try:
+    import orjson
+
+    def json_dumps(obj, default=None):
+        return orjson.dumps(obj, default=default).decode()
+
+    json_loads = orjson.loads
+except ImportError:
+    json_dumps = json.dumps
+    json_loads = json.loads
 
 # Configure logging for Lambda
 logger = logging.getLogger()
@@ -27,8 +45,58 @@ if not logger.handlers:
     ))
     logger.addHandler(handler)
 
+# AWS clients are built once per container and reused by warm invocations;
+# the larger pool and adaptive retries cover the parallel Q Business calls
+boto_config = Config(
+    max_pool_connections=50,
+    retries={'mode': 'adaptive', 'max_attempts': 10},
+    tcp_keepalive=True
+)
+cloudwatch_logs_client = boto3.client('logs', config=boto_config)
+qbusiness_client = boto3.client('qbusiness', config=boto_config)
+secrets_client = boto3.client('secretsmanager', config=boto_config)
+
+# Keep-alive HTTPS connections to ServiceNow, pooled across the parallel
+# queries and reused by warm invocations; the CA bundle is loaded once here
+SERVICENOW_CONCURRENCY = int(os.getenv('SERVICENOW_CONCURRENCY', '16'))
+servicenow_ssl_context = ssl.create_default_context()
+servicenow_http = urllib3.PoolManager(
+    num_pools=1,
+    maxsize=SERVICENOW_CONCURRENCY,
+    ssl_context=servicenow_ssl_context,
+    retries=Retry(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=[429, 500, 502, 503, 504],
+        raise_on_status=False
+    ),
+    timeout=30
+)
+
+# ServiceNow passwords already read from Secrets Manager, by secret name
+servicenow_passwords = {}
+
+# ServiceNow members per (host, role ID), as (expires_at, members), so warm
+# invocations within SERVICENOW_CACHE_TTL seconds skip the HTTP call. Only
+# the invocation's main thread reads or writes it, in write order, so the
+# first key is always the oldest entry.
+servicenow_role_cache = {}
+SERVICENOW_ROLE_CACHE_SIZE = 4096
+
 
 class LogStreamProcessor:
+    # CloudWatch Logs filter pattern for the lines that carry a role ID
+    ROLE_LOG_FILTER = '"Retrieving group members for group id:"'
+
+    # FilterLogEvents accepts at most this many log stream names per request
+    MAX_FILTER_LOG_STREAMS = 100
+
+    # Role IDs per ServiceNow query (role.sys_idIN keeps the URL short)
+    SERVICENOW_BATCH_SIZE = 50
+
+    # Rows per ServiceNow page, the Table API's default maximum
+    SERVICENOW_PAGE_SIZE = 10000
+
     def __init__(
             self,
             application_id=None,
@@ -45,10 +113,10 @@ class LogStreamProcessor:
         """
         logger.info("Initializing LogStreamProcessor")
 
-        # Initialize AWS clients
-        self.cloudwatch_logs = boto3.client('logs')
-        self.qbusiness = boto3.client('qbusiness')
-        self.secrets_client = boto3.client('secretsmanager')
+        # Reuse the module-level AWS clients
+        self.cloudwatch_logs = cloudwatch_logs_client
+        self.qbusiness = qbusiness_client
+        self.secrets_client = secrets_client
 
         # Get configuration from environment variables with optional overrides
         self.application_id = application_id or os.getenv('APPLICATION_ID')
@@ -61,12 +129,18 @@ class LogStreamProcessor:
         self.global_domain = global_domain or os.getenv('GLOBAL_DOMAIN')
 
         # Get ServiceNow password from Secrets Manager if not provided
-        if not servicenow_password:
+        if servicenow_password:
+            self.servicenow_password = servicenow_password
+        else:
             secret_name = os.getenv('SERVICENOW_SECRET_NAME')
             if not secret_name:
                 logger.error("SERVICENOW_SECRET_NAME env variable not set")
                 raise ValueError("SERVICENOW_SECRET_NAME env variable not set")
 
+            # Warm invocations reuse the password read by an earlier one
+            self.servicenow_password = servicenow_passwords.get(secret_name)
+
+        if not self.servicenow_password:
             try:
                 secret_response = (
                     self.secrets_client.get_secret_value(
@@ -77,6 +151,7 @@ class LogStreamProcessor:
                 self.servicenow_password = secret_value.get('password')
                 if not self.servicenow_password:
                     raise ValueError("Password not found in secret value")
+                servicenow_passwords[secret_name] = self.servicenow_password
             except ClientError as e:
                 logger.error(
                     f"Failed to retrieve secret: "
@@ -88,8 +163,6 @@ class LogStreamProcessor:
             except (json.JSONDecodeError, KeyError) as e:
                 logger.error(f"Invalid secret format: {str(e)}")
                 raise ValueError("Invalid secret format")
-        else:
-            self.servicenow_password = servicenow_password
 
         logger.info(
             f"Configuration loaded - Application ID: {self.application_id}, "
@@ -132,10 +205,16 @@ class LogStreamProcessor:
         self.servicenow_params = {
             'sysparm_fields': 'role.sys_id,role.name,user.sys_id,user.email',
             'sysparm_query_template': (
-                'role.sys_id={role_id}^ORDERBYsys_created_on^state=active^'
+                'role.sys_idIN{role_ids}^ORDERBYsys_created_on^state=active^'
                 'role.nameISNOTEMPTY^user.emailISNOTEMPTY^user.active=true'
             )
         }
+        # The fields list and page size are the same for every query, so
+        # encode them once
+        self.servicenow_static_query = parse.urlencode({
+            'sysparm_fields': self.servicenow_params['sysparm_fields'],
+            'sysparm_limit': self.SERVICENOW_PAGE_SIZE
+        })
 
         try:
             # Set up basic auth
@@ -156,6 +235,12 @@ class LogStreamProcessor:
             )
             raise
 
+        self.servicenow_concurrency = SERVICENOW_CONCURRENCY
+        self.servicenow_cache_ttl = int(
+            os.getenv('SERVICENOW_CACHE_TTL', '300')
+        )
+        self.servicenow_http = servicenow_http
+
         # Compile regex pattern for role ID extraction
         self.role_pattern = re.compile(
             r"Retrieving group members for group id:\s*([a-f0-9]{32})"
@@ -167,24 +252,30 @@ class LogStreamProcessor:
         """
         logger.info("Fetching latest sync job ID")
         try:
-            response = self.qbusiness.list_data_source_sync_jobs(
-                applicationId=self.application_id,
-                dataSourceId=self.data_source_id,
-                indexId=self.index_id
+            paginator = (
+                self.qbusiness.get_paginator('list_data_source_sync_jobs')
             )
 
-            sync_jobs = response.get('history', [])
+            # Keep a running max across every page of the sync job history
+            sync_jobs = (
+                job
+                for page in paginator.paginate(
+                    applicationId=self.application_id,
+                    dataSourceId=self.data_source_id,
+                    indexId=self.index_id
+                )
+                for job in page.get('history', [])
+            )
+            latest_job = max(
+                sync_jobs,
+                key=lambda x: x.get('startTime', datetime.min),
+                default=None
+            )
 
-            if not sync_jobs:
+            if not latest_job:
                 logger.warning("No sync jobs found")
                 return None
 
-            latest_job = sorted(
-                sync_jobs,
-                key=lambda x: x.get('startTime', datetime.min),
-                reverse=True
-            )[0]
-
             job_status = latest_job.get('status')
             execution_id = latest_job.get('executionId')
 
@@ -241,73 +332,67 @@ class LogStreamProcessor:
             logger.error(f"Error searching for log streams: {str(e)}")
             raise
 
-    def extract_role_ids(self, log_stream_name):
+    def extract_role_ids(self, log_stream_names):
         """
-        Extract all role IDs from the log stream
+        Extract all role IDs from the log streams
+
+        CloudWatch Logs returns only the events matching ROLE_LOG_FILTER, and
+        the regex then extracts the role ID from each of them
         """
         logger.info(
-            f"Starting role ID extraction from log stream: "
-            f"{log_stream_name}"
+            f"Starting role ID extraction from "
+            f"{len(log_stream_names)} log stream(s)"
         )
-        role_ids_with_timestamps = {}
-        next_token = None
+        # Newest event timestamp (ms) per role ID
+        role_timestamps = {}
         events_processed = 0
 
-        try:
-            while True:
-                kwargs = {
-                    'logGroupName': self.log_group_name,
-                    'logStreamName': log_stream_name,
-                    'startFromHead': True,
-                    'limit': 100
-                }
-
-                if next_token:
-                    kwargs['nextToken'] = next_token
-
-                response = self.cloudwatch_logs.get_log_events(**kwargs)
-
-                # Process each log event
-                for event in response['events']:
-                    events_processed += 1
-                    message = event['message']
-                    match = self.role_pattern.search(message)
-                    if match:
-                        role_id = match.group(1)
-                        timestamp = event['timestamp']
-
-                        # Log the full message and match for debugging
-                        logger.info(f"Found match in message: {message}")
-                        logger.info(f"Extracted SourceId: {role_id}")
-
-                        # Store or update role ID with its timestamp
-                        if (
-                            role_id not in role_ids_with_timestamps
-                            or timestamp > role_ids_with_timestamps[role_id][
-                                'timestamp'
-                            ]
-                        ):
-                            role_ids_with_timestamps[role_id] = {
-                                'timestamp': timestamp,
-                                'datetime': datetime.fromtimestamp(
-                                    timestamp/1000
-                                ).isoformat()
-                            }
+        paginator = self.cloudwatch_logs.get_paginator('filter_log_events')
+        stream_batches = [
+            log_stream_names[start:start + self.MAX_FILTER_LOG_STREAMS]
+            for start in range(
+                0, len(log_stream_names), self.MAX_FILTER_LOG_STREAMS
+            )
+        ]
 
-                # Check if we've reached the end of the stream
-                if next_token == response.get('nextForwardToken'):
-                    break
+        try:
+            for stream_batch in stream_batches:
+                for page in paginator.paginate(
+                    logGroupName=self.log_group_name,
+                    logStreamNames=stream_batch,
+                    filterPattern=self.ROLE_LOG_FILTER
+                ):
+                    # Process each log event
+                    for event in page.get('events', []):
+                        events_processed += 1
+                        message = event['message']
+                        match = self.role_pattern.search(message)
+                        if match:
+                            role_id = match.group(1)
+                            timestamp = event['timestamp']
+
+                            # Log the full message and match for debugging
+                            if logger.isEnabledFor(logging.DEBUG):
+                                logger.debug(
+                                    f"Extracted SourceId {role_id} from "
+                                    f"message: {message}"
+                                )
 
-                next_token = response['nextForwardToken']
+                            # Store or update role ID with its timestamp
+                            previous = role_timestamps.get(role_id)
+                            if previous is None or timestamp > previous:
+                                role_timestamps[role_id] = timestamp
 
-            # Convert to list and sort by timestamp
+            # Convert to list, formatting each role's datetime once
             role_ids_list = [
                 {
                     'role_id': role_id,
-                    'timestamp': info['timestamp'],
-                    'datetime': info['datetime']
+                    'timestamp': timestamp,
+                    'datetime': datetime.fromtimestamp(
+                        timestamp/1000
+                    ).isoformat()
                 }
-                for role_id, info in role_ids_with_timestamps.items()
+                for role_id, timestamp in role_timestamps.items()
             ]
 
             # Sort by timestamp, newest first
@@ -328,6 +413,9 @@ class LogStreamProcessor:
         """
         Retrieve role member info from ServiceNow API for given role IDs.
 
+        Roles are queried SERVICENOW_BATCH_SIZE at a time, with up to
+        SERVICENOW_CONCURRENCY queries in flight.
+
         Args:
             role_data_list (List[Dict]): List of dictionaries with role_id,
                 timestamp, and datetime
@@ -337,211 +425,228 @@ class LogStreamProcessor:
                 timestamp data
         """
         all_results = []
-        processed_roles = 0
         total_roles = len(role_data_list)
 
         logger.info(
             f"Starting to process {total_roles} role(s) for ServiceNow"
         )
         logger.info(f"URL for ServiceNow call is {self.servicenow_base_url}")
-        # Create SSL context
-        context = ssl.create_default_context()
 
+        role_entries = []
         for role_entry in role_data_list:
-            role_id = role_entry.get('role_id')
-            if not role_id:
+            if not role_entry.get('role_id'):
                 logger.warning(
                     f"Skipping entry with missing role_id: {role_entry}"
                 )
                 continue
+            role_entries.append(role_entry)
 
-            try:
-                # Construct query parameters for this specific role
-                params = self.servicenow_params.copy()
-                params['sysparm_query'] = (
-                    self.servicenow_params['sysparm_query_template'].format(
-                        role_id=role_id
-                    )
-                )
+        members_by_role = self._get_members_by_role(
+            [role_entry['role_id'] for role_entry in role_entries]
+        )
 
-                # Build URL with encoded parameters
-                full_url = (
-                    f"{self.servicenow_base_url}?"
-                    f"{parse.urlencode(params)}"
-                )
+        # Add timestamp and datetime from input data to each result
+        for role_entry in role_entries:
+            role_id = role_entry['role_id']
+            all_results.extend(
+                {
+                    **member,
+                    'timestamp': role_entry['timestamp'],
+                    'datetime': role_entry['datetime'],
+                    'source_role_id': role_id
+                }
+                for member in members_by_role[role_id]
+            )
 
-                # Create request object
-                req = request.Request(
-                    url=full_url,
-                    headers=self.servicenow_headers,
-                    method='GET'
-                )
+        logger.info(f"Completed processing {len(role_entries)} roles")
+        logger.info(f"Total member records retrieved: {len(all_results)}")
+
+        return all_results
 
-                logger.debug(f"Fetching data for role ID: {role_id}")
+    def _get_members_by_role(self, role_ids: List[str]) -> Dict[str, List]:
+        """
+        Map each role ID to its ServiceNow members, from the warm-container
+        cache where possible and batched queries otherwise
+        """
+        now = time.monotonic()
+        members_by_role = {}
+        uncached_role_ids = []
 
-                # Make the request
-                with request.urlopen(
-                    req,
-                    context=context,
-                    timeout=30
-                ) as response:
-                    data = json.loads(
-                        response.read().decode('utf-8')
+        for role_id in role_ids:
+            if role_id in members_by_role:
+                continue
+            cached = servicenow_role_cache.get(
+                (self.servicenow_host, role_id)
+            )
+            if cached and cached[0] > now:
+                members_by_role[role_id] = cached[1]
+            else:
+                members_by_role[role_id] = []
+                uncached_role_ids.append(role_id)
+
+        logger.info(
+            f"{len(role_ids) - len(uncached_role_ids)} role(s) served from "
+            f"cache, querying ServiceNow for {len(uncached_role_ids)}"
+        )
+
+        batches = [
+            uncached_role_ids[start:start + self.SERVICENOW_BATCH_SIZE]
+            for start in range(
+                0, len(uncached_role_ids), self.SERVICENOW_BATCH_SIZE
+            )
+        ]
+        processed_roles = 0
+
+        with ThreadPoolExecutor(
+            max_workers=self.servicenow_concurrency
+        ) as executor:
+            for batch, rows in zip(
+                batches, executor.map(self._query_roles, batches)
+            ):
+                # Map each returned row back to the role it was found for
+                for row in rows:
+                    role_members = members_by_role.get(row.get('role.sys_id'))
+                    if role_members is not None:
+                        role_members.append(row)
+
+                for role_id in batch:
+                    cache_key = (self.servicenow_host, role_id)
+                    # Re-insert a refreshed key so it moves to the end
+                    servicenow_role_cache.pop(cache_key, None)
+                    cache_size = len(servicenow_role_cache)
+                    if cache_size >= SERVICENOW_ROLE_CACHE_SIZE:
+                        # Evict the oldest entry
+                        oldest_key = next(iter(servicenow_role_cache))
+                        servicenow_role_cache.pop(oldest_key)
+                    servicenow_role_cache[cache_key] = (
+                        now + self.servicenow_cache_ttl,
+                        members_by_role[role_id]
                     )
 
-                    # Add timestamp and datetime from input data to each result
-                    for result in data.get('result', []):
-                        result.update({
-                            'timestamp': role_entry['timestamp'],
-                            'datetime': role_entry['datetime'],
-                            'source_role_id': role_id
-                        })
+                processed_roles += len(batch)
+                logger.info(
+                    f"Processed {processed_roles}/{len(uncached_role_ids)} "
+                    f"roles"
+                )
 
-                    all_results.extend(data.get('result', []))
-                    processed_roles += 1
+        return members_by_role
 
-                    if processed_roles % 10 == 0:
-                        logger.info(
-                            f"Processed {processed_roles}/{total_roles} roles"
-                        )
+    def _query_roles(self, role_ids: List[str]) -> List[Dict]:
+        """
+        Query ServiceNow for the members of a batch of roles, following
+        sysparm_offset until the last page
+        """
+        role_query = self.servicenow_params['sysparm_query_template'].format(
+            role_ids=','.join(role_ids)
+        )
+        # Append the batch-specific query to the pre-encoded parameters
+        query_url = (
+            f"{self.servicenow_base_url}?{self.servicenow_static_query}"
+            f"&sysparm_query={parse.quote_plus(role_query)}"
+        )
+        rows = []
+
+        logger.debug("Fetching data for role IDs: %s", role_ids)
 
-            except error.HTTPError as e:
+        while True:
+            full_url = f"{query_url}&sysparm_offset={len(rows)}"
+
+            try:
+                # Make the request over a pooled connection
+                response = self.servicenow_http.request(
+                    'GET', full_url, headers=self.servicenow_headers
+                )
+            except urllib3.exceptions.HTTPError as e:
                 logger.error(
-                    f"HTTP Error for role ID {role_id}: {e.code} - {e.reason}"
+                    f"Connection error for role IDs {role_ids}: {str(e)}"
                 )
-                logger.error(f"Response: {e.read().decode('utf-8')}")
-                raise
-            except error.URLError as e:
-                logger.error(f"URL Error for role ID {role_id}: {str(e)}")
-                if hasattr(e, 'reason'):
-                    logger.error(f"Failure reason: {str(e.reason)}")
                 raise
-            except json.JSONDecodeError as e:
+
+            if response.status >= 400:
                 logger.error(
-                    f"JSON Decode Error for role ID {role_id}: {str(e)}"
+                    f"HTTP Error for role IDs {role_ids}: "
+                    f"{response.status} - {response.reason}"
                 )
-                raise
-            except Exception as e:
+                logger.error(f"Response: {response.data.decode('utf-8')}")
+                raise urllib3.exceptions.HTTPError(
+                    f"ServiceNow returned HTTP {response.status} "
+                    f"for role IDs {role_ids}"
+                )
+
+            try:
+                page = json_loads(response.data).get('result', [])
+            except json.JSONDecodeError as e:
                 logger.error(
-                    f"Unexpected error for role ID {role_id}: {str(e)}"
+                    f"JSON Decode Error for role IDs {role_ids}: {str(e)}"
                 )
                 raise
 
-        logger.info(f"Completed processing {processed_roles} roles")
-        logger.info(f"Total member records retrieved: {len(all_results)}")
-
-        return all_results
+            rows.extend(page)
+            if len(page) < self.SERVICENOW_PAGE_SIZE:
+                return rows
 
     def resolve_users(self, results: List[Dict]):
         """
         Process user updates/creations for Q Business based on ServiceNow role
         members
 
+        Members are processed concurrently, QBUSINESS_CONCURRENCY at a time.
+
         Args:
             results: List of dictionaries containing ServiceNow role member
                 information
         """
-        for member in results:
-            try:
-                user_email = member.get('user.email')
-                user_sys_id = member.get('user.sys_id')
-                role_name = member.get('role.name')
-
-                if not user_email or not user_sys_id:
-                    logger.error(
-                        f"Missing required user info for role {role_name}"
-                    )
-                    continue
+        # No two threads may update or create the same user
+        members = self.unique_members(results)
 
-                # First attempt to update the user
-                try:
-                    # Transform email for creation
-                    # Convert domain structure to match users
-                    modified_email = (
-                        f"{user_email.split('@')[0]}"
-                        f"@{self.global_domain}"
-                    )
-
-                    # userId must match the globalid value
-                    # userId (within userAliasesToUpdate must
-                    # be the modified email
-                    response = self.qbusiness.update_user(
-                        applicationId=self.application_id,
-                        userId=modified_email,
-                        userAliasesToUpdate=[
-                            {
-                                'userId': user_email
-                            }
-                        ]
-                    )
-
-                    logger.info(
-                        f"Successfully updated alias for {modified_email} to "
-                        f"SNow user refernece {user_email}"
-                    )
-                    logger.debug(
-                        f"Q Business update_user response: {response}"
-                    )
+        max_workers = int(os.getenv('QBUSINESS_CONCURRENCY', '8'))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(self._update_or_create, members))
 
-                except ClientError as e:
-                    error_code = e.response.get('Error', {}).get('Code')
+    def unique_members(self, results: List[Dict]) -> List[Dict]:
+        """
+        Drop repeated users from ServiceNow role member rows
 
-                    if error_code == 'ResourceNotFoundException':
-                        logger.info(
-                            f"User {modified_email} not found. Attempting to "
-                            f"create user"
-                        )
+        A user holding several roles has one row per role; the first valid
+        row per email is kept. Invalid rows are kept so their error is
+        still logged by resolve_users.
+        """
+        members = []
+        seen_emails = set()
+        for member in results:
+            user_email = member.get('user.email')
+            if user_email and member.get('user.sys_id'):
+                if user_email in seen_emails:
+                    continue
+                seen_emails.add(user_email)
+            members.append(member)
+        return members
 
-                        # Transform email for creation
-                        # Convert domain structure to match users
-                        modified_email = (
-                            f"{user_email.split('@')[0]}"
-                            f"@{self.global_domain}"
-                        )
+    def _update_or_create(self, member: Dict) -> Dict:
+        """
+        Update the Q Business alias for one ServiceNow role member, creating
+        the user if it does not exist yet
+        """
+        user_email = member.get('user.email')
+        user_sys_id = member.get('user.sys_id')
 
-                        try:
-                            # Create the user with modified email, which would
-                            # match their globalid value
-                            response = self.qbusiness.create_user(
-                                applicationId=self.application_id,
-                                userId=modified_email,
-                                userAliases=[
-                                    {
-                                        'userId': user_email
-                                    },
-                                ]
-                            )
-
-                            logger.info(
-                                f"Successfully created user {modified_email} "
-                                f"with ServiceNow alias {user_email}"
-                                )
-                            logger.debug(
-                                f"Q Business create user response: {response}"
-                            )
-                        except ClientError as create_error:
-                            logger.error(
-                                f"Failed to create user {modified_email}: "
-                                f"{str(create_error)}"
-                                )
-                            continue
-                    else:
-                        logger.error(
-                            f"Error updating user {user_email}: {str(e)}"
-                            )
-                        continue
+        if not user_email or not user_sys_id:
+            error_msg = (
+                f"Missing required user info for role "
+                f"{member.get('role.name')}"
+            )
+            logger.error(error_msg)
+            return {
+                'success': False,
+                'error': error_msg
+            }
 
-            except Exception as e:
-                logger.error(
-                    f"Unexpected error processing member with email "
-                    f"{member.get('user.email', 'UNKNOWN')}: {str(e)}"
-                )
-                continue
+        return self.process_single_user(user_email)
 
     def process_single_user(self, user_email: str) -> Dict:
         """
         Process a single user email for domain normalization
-            and Q Business update.
+            and Q Business update. Also used per member by resolve_users.
 
         Args:
             user_email (str): The email address to process
@@ -549,7 +654,7 @@ class LogStreamProcessor:
         Returns:
             Dict: Response containing status and processing details
         """
-        logger.info(f"Processing single user update for: {user_email}")
+        logger.info(f"Processing user update for: {user_email}")
 
         try:
             # Transform email for creation
@@ -574,9 +679,8 @@ class LogStreamProcessor:
                     f"Successfully updated alias for {modified_email} to "
                     f"SNow user reference {user_email}"
                 )
-                logger.debug(
-                    f"Q Business update_user response: {response}"
-                )
+                # Lazy formatting: the response is only repr'd at DEBUG level
+                logger.debug("Q Business update_user response: %s", response)
 
                 return {
                     'success': True,
@@ -610,7 +714,7 @@ class LogStreamProcessor:
                             f"with ServiceNow alias {user_email}"
                         )
                         logger.debug(
-                            f"Q Business create user response: {response}"
+                            "Q Business create user response: %s", response
                         )
 
                         return {
@@ -667,12 +771,12 @@ def lambda_handler(event, context):
             if result.get('success', False):
                 return {
                     'statusCode': 200,
-                    'body': json.dumps(result)
+                    'body': json_dumps(result)
                 }
             else:
                 return {
                     'statusCode': 500,
-                    'body': json.dumps(result)
+                    'body': json_dumps(result)
                 }
 
         # Get the sync job ID from the event or fetch the latest
@@ -685,7 +789,7 @@ def lambda_handler(event, context):
             logger.warning("No sync job found")
             return {
                 'statusCode': 404,
-                'body': json.dumps({
+                'body': json_dumps({
                     'error': 'No sync job found',
                     'applicationId': processor.application_id,
                     'dataSourceId': processor.data_source_id,
@@ -701,17 +805,14 @@ def lambda_handler(event, context):
             )
             return {
                 'statusCode': 404,
-                'body': json.dumps({
+                'body': json_dumps({
                     'error': 'Log streams not found',
                     'sync_job_run_id': sync_job_run_id
                 })
             }
 
         # Extract role IDs from all log streams
-        all_role_ids = []
-        for log_stream_name in log_stream_names:
-            stream_role_ids = processor.extract_role_ids(log_stream_name)
-            all_role_ids.extend(stream_role_ids)
+        all_role_ids = processor.extract_role_ids(log_stream_names)
 
         logger.info(
             f"Successfully processed {len(log_stream_names)} "
@@ -739,9 +840,10 @@ def lambda_handler(event, context):
 
             # Process users in Q Business
             try:
-                response = processor.resolve_users(results)
+                members = processor.unique_members(results)
+                response = processor.resolve_users(members)
                 logger.info(
-                    f"Successfully processed {len(results)} "
+                    f"Successfully processed {len(members)} "
                     f"members in Q Business"
                 )
 
@@ -771,15 +873,23 @@ def lambda_handler(event, context):
             logger.error(f"Critical error in process_role_members: {str(e)}")
             raise
 
+        # Report each user once, as resolve_users wrote them
+        member_emails = [
+            member['user.email'] for member in members
+            if member.get('user.email') and member.get('user.sys_id')
+        ]
+
+        # Return identifiers only, as documented, so large syncs stay well
+        # under the 6 MB Lambda response limit
         response = {
             'statusCode': 200,
-            'body': json.dumps({
+            'body': json_dumps({
                 'sync_job_run_id': sync_job_run_id,
-                'log_stream_name': log_stream_name,
-                'role_ids': all_role_ids,
+                'log_stream_name': log_stream_names[-1],
+                'role_ids': [entry['role_id'] for entry in all_role_ids],
                 'role_count': len(all_role_ids),
-                'member_count_update': len(results),
-                'members': results,
+                'member_count_update': len(member_emails),
+                'members': member_emails,
                 'configuration': {
                     'applicationId': processor.application_id,
                     'dataSourceId': processor.data_source_id,
@@ -798,19 +908,19 @@ def lambda_handler(event, context):
         logger.error(f"Validation error: {error_msg}")
         return {
             'statusCode': 400,
-            'body': json.dumps({'error': error_msg})
+            'body': json_dumps({'error': error_msg})
         }
     except ClientError as e:
         error_msg = f"AWS API Error: {str(e)}"
         logger.error(error_msg)
         return {
             'statusCode': 500,
-            'body': json.dumps({'error': error_msg})
+            'body': json_dumps({'error': error_msg})
         }
     except Exception as e:
         error_msg = f"Unexpected error: {str(e)}"
         logger.error(error_msg, exc_info=True)
         return {
             'statusCode': 500,
-            'body': json.dumps({'error': error_msg})
+            'body': json_dumps({'error': error_msg})
         }
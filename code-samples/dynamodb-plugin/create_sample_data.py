@@ -20,13 +20,17 @@ CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 """
 
 import boto3
+from botocore.config import Config
+import os
 import uuid
 import random
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 import json
 
-# Initialize DynamoDB client
-dynamodb = boto3.resource('dynamodb')
+# Initialize DynamoDB client; adaptive retries back off when batch writes are throttled,
+# and batch_writer re-sends any UnprocessedItems on its next flush
+dynamodb = boto3.resource('dynamodb', config=Config(retries={'mode': 'adaptive', 'max_attempts': 10}))
 table_name = 'policy-data-dev'  # Replace with your actual table name from CloudFormation output
 table = dynamodb.Table(table_name)
 
@@ -38,39 +42,84 @@ policy_statuses = ['Active', 'Lapsed', 'Cancelled']
 risk_ratings = ['Low', 'Medium', 'High']
 compliance_values = ['TRUE', 'FALSE']
 
-# Generate random date within range
-def random_date(start_date, end_date):
-    time_between = end_date - start_date
-    days_between = time_between.days
+# Generate random date within days_between days after start_date
+def random_date(start_date, days_between):
     random_days = random.randrange(days_between)
     return (start_date + timedelta(days=random_days)).strftime('%Y-%m-%d')
 
-# Create sample policies
-def create_sample_policies(count=50):
-    for i in range(count):
-        policy = {
-            'policy_id': str(uuid.uuid4()),
-            'customer_id': str(uuid.uuid4()),
-            'agent_id': str(uuid.uuid4()),
-            'policy_type': random.choice(policy_types),
-            'vehicle_type': random.choice(vehicle_types),
-            'policy_status': random.choice(policy_statuses),
-            'premium_amount': f"${random.randint(500, 3000)}",
-            'deductible': f"${random.choice([250, 500, 1000, 2000])}",
-            'coverage_limit': f"${random.randint(25000, 250000)}",
-            'state': random.choice(states),
-            'risk_rating': random.choice(risk_ratings),
-            'start_date': random_date(datetime.now() - timedelta(days=365*2), datetime.now()),
-            'end_date': random_date(datetime.now(), datetime.now() + timedelta(days=365*2)),
-            'last_updated': datetime.now().strftime('%Y-%m-%d'),
+# Build sample policy items
+def build_sample_policies(count):
+    # Draw each random column in one call, then assemble the items row by row
+    columns = zip(
+        random.choices(policy_types, k=count),
+        random.choices(vehicle_types, k=count),
+        random.choices(policy_statuses, k=count),
+        random.choices(range(500, 3001), k=count),
+        random.choices([250, 500, 1000, 2000], k=count),
+        random.choices(range(25000, 250001), k=count),
+        random.choices(states, k=count),
+        random.choices(risk_ratings, k=count),
+        random.choices(compliance_values, k=count),
+        random.choices(range(1, 4), k=count),
+        random.choices(range(0, 10), k=count)
+    )
+
+    # Date bounds are fixed for the whole run
+    now = datetime.now()
+    start_floor = now - timedelta(days=365*2)
+    start_span = (now - start_floor).days
+    end_span = (now + timedelta(days=365*2) - now).days
+    last_updated = now.strftime('%Y-%m-%d')
+
+    # Three v4 UUIDs per policy, sliced from a single urandom read
+    raw = os.urandom(16 * 3 * count)
+    ids = iter([str(uuid.UUID(bytes=raw[o:o + 16], version=4))
+                for o in range(0, len(raw), 16)])
+
+    policies = []
+    for i, (policy_type, vehicle_type, policy_status, premium, deductible,
+            coverage_limit, state, risk_rating, is_compliant,
+            major_version, minor_version) in enumerate(columns):
+        policies.append({
+            'policy_id': next(ids),
+            'customer_id': next(ids),
+            'agent_id': next(ids),
+            'policy_type': policy_type,
+            'vehicle_type': vehicle_type,
+            'policy_status': policy_status,
+            'premium_amount': f"${premium}",
+            'deductible': f"${deductible}",
+            'coverage_limit': f"${coverage_limit}",
+            'state': state,
+            'risk_rating': risk_rating,
+            'start_date': random_date(start_floor, start_span),
+            'end_date': random_date(now, end_span),
+            'last_updated': last_updated,
             'notes': f"Sample policy {i+1}",
-            'is_compliant': random.choice(compliance_values),
-            'product_version': f"v{random.randint(1, 3)}.{random.randint(0, 9)}"
-        }
-        
-        # Write to DynamoDB
-        table.put_item(Item=policy)
-        print(f"Created policy {i+1}/{count}")
+            'is_compliant': is_compliant,
+            'product_version': f"v{major_version}.{minor_version}"
+        })
+    return policies
+
+# Write one shard of policies; each worker needs its own batch_writer
+def write_policies(policies):
+    # batch_writer groups the puts into BatchWriteItem calls of up to 25 items
+    with table.batch_writer(overwrite_by_pkeys=['policy_id']) as batch:
+        for policy in policies:
+            batch.put_item(Item=policy)
+    return len(policies)
+
+# Create sample policies
+def create_sample_policies(count=50, workers=8):
+    policies = build_sample_policies(count)
+    shards = [policies[i::workers] for i in range(workers)]
+
+    # Write to DynamoDB
+    created = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for written in executor.map(write_policies, shards):
+            created += written
+            print(f"Created policy {created}/{count}")
 
 # Run the function to create sample data
 if __name__ == "__main__":
@@ -49,9 +49,13 @@ echo "Environment: $ENVIRONMENT"
 echo "Q Business App Name: $Q_BUSINESS_APP_NAME"
 echo "Region: $REGION"
 
-# Create deployment package for Lambda
+# Create deployment package for Lambda, bundling orjson built for the Lambda runtime
 echo "Creating Lambda deployment package..."
-zip -r lambda.zip lambda.py
+rm -rf package && mkdir package
+pip install --quiet --target package --platform manylinux2014_x86_64 \
+    --implementation cp --python-version 3.9 --only-binary=:all: orjson
+cp lambda.py package/
+(cd package && zip -qr ../lambda.zip .)
 
 # Deploy CloudFormation stack
 echo "Deploying CloudFormation stack..."
@@ -81,7 +85,7 @@ aws lambda update-function-code \
 
 # Clean up
 echo "Cleaning up..."
-rm lambda.zip
+rm -rf lambda.zip package
 
 # Get API endpoint from stack outputs
 API_ENDPOINT=$(aws cloudformation describe-stacks \
@@ -21,98 +21,332 @@ IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
 CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 """
 
+import base64
 import json
 import boto3
 import os
+import hashlib
+import heapq
 import logging
+import random
 import time
 import re
 import uuid
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import lru_cache
+from itertools import islice
 from decimal import Decimal
-from boto3.dynamodb.conditions import Key, Attr
+from boto3.dynamodb.conditions import Key, Attr, ConditionExpressionBuilder
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+from botocore.config import Config
 from botocore.exceptions import ClientError
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-# Initialize AWS X-Ray if available
-try:
-    from aws_xray_sdk.core import patch_all
-    patch_all()
-    logger.info("AWS X-Ray initialized")
-except ImportError:
-    logger.info("AWS X-Ray SDK not available")
+# Initialize AWS X-Ray only when enabled; patching every SDK client adds to cold starts
+if os.environ.get("ENABLE_XRAY") == "1":
+    try:
+        from aws_xray_sdk.core import patch_all
+        patch_all()
+        logger.info("AWS X-Ray initialized")
+    except ImportError:
+        logger.info("AWS X-Ray SDK not available")
 
-# Initialize DynamoDB with connection pooling
+# Initialize DynamoDB from one session with pooled, kept-alive connections
+# that are reused across warm invocations
 region = os.environ.get("AWS_REGION", "us-east-1")
-dynamodb_client = boto3.client('dynamodb', region_name=region, config=boto3.config.Config(
-    max_pool_connections=100
-))
-dynamodb = boto3.resource('dynamodb', region_name=region, config=boto3.config.Config(
-    max_pool_connections=100
-))
+boto_config = Config(
+    max_pool_connections=100,
+    tcp_keepalive=True,
+    retries={'mode': 'adaptive', 'max_attempts': 10},
+    connect_timeout=1,
+    read_timeout=3
+)
+session = boto3.session.Session(region_name=region)
+dynamodb_client = session.client('dynamodb', config=boto_config)
+dynamodb = session.resource('dynamodb', config=boto_config)
 table_name = os.environ.get("TABLE_NAME", "policy-data")
-table = dynamodb.Table(table_name)
-
-# Simple in-memory cache with TTL
-cache = {}
-cache_ttl = {}
-DEFAULT_CACHE_TTL = 60  # seconds#
- Constants for validation
-VALID_STATES = ['California', 'Illinois']
-VALID_POLICY_TYPES = ['Liability', 'Collision', 'Comprehensive', 'Full Coverage']
-VALID_VEHICLE_TYPES = ['Motorcycle', 'SUV', 'Sedan', 'Truck']
-VALID_POLICY_STATUSES = ['Active', 'Lapsed', 'Cancelled']
-VALID_RISK_RATINGS = ['Low', 'Medium', 'High']
-VALID_COMPLIANCE_VALUES = ['TRUE', 'FALSE']
-UUID_PATTERN = r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$'
-VERSION_PATTERN = r'^v\d+\.\d+$'
-DATE_PATTERN = r'^\d{4}-\d{2}-\d{2}$'
+
+# Optional table holding a rolling statistics aggregate, maintained on every write
+stats_table_name = os.environ.get("STATS_TABLE_NAME")
+
+# Route item reads and writes through DAX when a cluster endpoint is configured
+dax_endpoint = os.environ.get("DAX_ENDPOINT")
+if dax_endpoint:
+    try:
+        from amazondax import AmazonDaxClient
+        dynamodb = AmazonDaxClient.resource(endpoint_url=dax_endpoint, region_name=region)
+        logger.info(f"Using DAX cluster: {dax_endpoint}")
+    except ImportError:
+        dax_endpoint = None
+        logger.warning("DAX_ENDPOINT is set but amazondax is not available; using DynamoDB directly")
+
+# The Table resource is built on first use rather than at import
+_table = None
+
+def get_table():
+    """DynamoDB (or DAX) Table resource, created on first use"""
+    global _table
+    if _table is None:
+        _table = dynamodb.Table(table_name)
+    return _table
+
+serializer = TypeSerializer()
+deserializer = TypeDeserializer()
+
+# Bounded in-memory cache settings
+DEFAULT_CACHE_TTL = 60  # seconds
+CACHE_MAX_SIZE = 512
+
+# Constants for validation
+VALID_STATES = frozenset(('California', 'Illinois'))
+VALID_POLICY_TYPES = frozenset(('Liability', 'Collision', 'Comprehensive', 'Full Coverage'))
+VALID_VEHICLE_TYPES = frozenset(('Motorcycle', 'SUV', 'Sedan', 'Truck'))
+VALID_POLICY_STATUSES = frozenset(('Active', 'Lapsed', 'Cancelled'))
+VALID_RISK_RATINGS = frozenset(('Low', 'Medium', 'High'))
+VALID_COMPLIANCE_VALUES = frozenset(('TRUE', 'FALSE'))
+POLICY_ATTRIBUTES = frozenset((
+    'policy_id', 'customer_id', 'agent_id', 'policy_type', 'vehicle_type', 'policy_status',
+    'premium_amount', 'deductible', 'coverage_limit', 'state', 'risk_rating', 'start_date',
+    'end_date', 'last_updated', 'notes', 'is_compliant', 'product_version'
+))
+VALID_SORT_FIELDS = frozenset(('premium_amount', 'start_date', 'end_date', 'last_updated'))
+UUID_RE = re.compile(r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$', re.I)
+VERSION_RE = re.compile(r'^v\d+\.\d+$')
+DATE_RE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+CURRENCY_RE = re.compile(r'[$,]')
+ITEM_PATH_RE = re.compile(r'^/items/(?P<policy_id>(?!search$|stats$)[^/]+)$')
+CURRENCY_CACHE_SIZE = 8192  # distinct parsed currency amounts kept per container
+
+# Filters that can be evaluated by DynamoDB as exact matches
+ENUM_FILTERS = [
+    ('state', VALID_STATES),
+    ('policy_status', VALID_POLICY_STATUSES),
+    ('policy_type', VALID_POLICY_TYPES),
+    ('vehicle_type', VALID_VEHICLE_TYPES),
+    ('risk_rating', VALID_RISK_RATINGS),
+    ('is_compliant', VALID_COMPLIANCE_VALUES)
+]
+
+# Response headers common to every request; the handler adds X-Request-ID
+BASE_HEADERS = {
+    'Content-Type': 'application/json',
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
+    'Access-Control-Allow-Headers': 'Content-Type, Authorization, x-api-key',
+    'Strict-Transport-Security': 'max-age=31536000; includeSubDomains',
+    'X-Content-Type-Options': 'nosniff',
+    'X-XSS-Protection': '1; mode=block',
+    'Cache-Control': 'no-store'
+}
+
+# Static GET / response body
+ROOT_BODY = json.dumps({
+    "message": "DynamoDB Plugin API",
+    "version": "1.0.0",
+    "endpoints": [
+        "GET /",
+        "GET /items",
+        "POST /items",
+        "GET /items/{policy_id}",
+        "PUT /items/{policy_id}",
+        "DELETE /items/{policy_id}",
+        "POST /items/search",
+        "GET /items/stats"
+    ]
+})
+
+# Date range filters: (parameter, item attribute, comparison)
+DATE_RANGE_FILTERS = [
+    ('start_date_from', 'start_date', '>='),
+    ('start_date_to', 'start_date', '<='),
+    ('end_date_from', 'end_date', '>='),
+    ('end_date_to', 'end_date', '<=')
+]
+
+# Search array filters (OR logic within each array): (filter, item attribute, valid values)
+SEARCH_ARRAY_FILTERS = [
+    ('states', 'state', VALID_STATES),
+    ('policy_types', 'policy_type', VALID_POLICY_TYPES),
+    ('vehicle_types', 'vehicle_type', VALID_VEHICLE_TYPES),
+    ('policy_statuses', 'policy_status', VALID_POLICY_STATUSES),
+    ('risk_ratings', 'risk_rating', VALID_RISK_RATINGS)
+]
+
+# Statistics summary groups: (summary key, item attribute)
+STATS_GROUP_FIELDS = [
+    ('by_state', 'state'),
+    ('by_policy_type', 'policy_type'),
+    ('by_vehicle_type', 'vehicle_type'),
+    ('by_policy_status', 'policy_status'),
+    ('by_risk_rating', 'risk_rating')
+]
+
+# Currency attributes averaged and ranged by the statistics endpoint
+STATS_AMOUNT_FIELDS = ('premium_amount', 'coverage_limit')
+
+# Every attribute the statistics read
+STATS_ATTRIBUTES = [field_name for _, field_name in STATS_GROUP_FIELDS] + list(STATS_AMOUNT_FIELDS) + ['is_compliant']
+
+# Statistics aggregate row, rebuilt from a table scan once it is older than
+# STATS_MAX_AGE seconds to bound drift from writes that bypass this function
+STATS_KEY = {'pk': {'S': 'STATS#global'}}
+STATS_MAX_AGE = int(os.environ.get("STATS_MAX_AGE", "3600"))
+
+# Exact-match list filters used to scope cache invalidation on writes
+CACHE_PREDICATE_FIELDS = [
+    'state', 'policy_status', 'policy_type', 'vehicle_type', 'risk_rating',
+    'is_compliant', 'deductible', 'agent_id', 'customer_id', 'product_version'
+]
+
+# Parallel scan segments for full-table reads; the client pool is sized well above this
+SCAN_SEGMENTS = int(os.environ.get("SCAN_SEGMENTS", "8"))
+
+# BatchGetItem limits and retry policy for unprocessed keys
+BATCH_GET_MAX_KEYS = 100
+BATCH_MAX_RETRIES = 8
+BATCH_RETRY_BASE_DELAY = 0.05  # seconds
+MAX_SEARCH_POLICY_IDS = 1000
+
+# GSI partition keys, in order of preference
+GSI_KEYS = [
+    ('state', 'StateIndex'),
+    ('policy_status', 'PolicyStatusIndex')
+]
 
 ###################
 # Cache Functions #
 ###################
 
-def get_cached_item(key, ttl=DEFAULT_CACHE_TTL):
-    """Get item from cache if it exists and hasn't expired"""
-    now = time.time()
-    if key in cache and cache_ttl.get(key, 0) > now:
-        logger.info(f"Cache hit for key: {key}")
-        return cache[key]
-    logger.info(f"Cache miss for key: {key}")
-    return None
-
-def set_cached_item(key, value, ttl=DEFAULT_CACHE_TTL):
-    """Store item in cache with expiration time"""
-    cache[key] = value
-    cache_ttl[key] = time.time() + ttl
-    logger.info(f"Cached item with key: {key}, TTL: {ttl}s")
-
-def invalidate_cache(key=None):
-    """Invalidate specific cache key or entire cache"""
-    if key:
-        if key in cache:
-            del cache[key]
-            del cache_ttl[key]
-            logger.info(f"Invalidated cache for key: {key}")
+class TTLCache:
+    """Bounded LRU cache whose entries also expire after a TTL"""
+    def __init__(self, maxsize=CACHE_MAX_SIZE):
+        self.maxsize = maxsize
+        # key -> (value, expires_at, stale_until, predicate), least recently used first
+        self._entries = OrderedDict()
+    
+    def get(self, key):
+        """Get item from cache if it exists and hasn't expired"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, expires_at, stale_until, _ = entry
+            now = time.monotonic()
+            if expires_at > now:
+                self._entries.move_to_end(key)
+                logger.info(f"Cache hit for key: {key}")
+                return value
+            # Drop expired entries lazily, keeping them through their stale window
+            if stale_until <= now:
+                del self._entries[key]
+        logger.info(f"Cache miss for key: {key}")
+        return None
+    
+    def get_stale(self, key):
+        """Get an expired item that is still within its stale window, for use when a refresh fails"""
+        entry = self._entries.get(key)
+        if entry is not None and entry[2] > time.monotonic():
+            logger.info(f"Serving stale cache entry for key: {key}")
+            return entry[0]
+        return None
+    
+    def set(self, key, value, ttl=DEFAULT_CACHE_TTL, predicate=None, stale_ttl=0):
+        """Store item in cache with expiration time, evicting the least recently used if full
+        
+        predicate maps attribute names to the values a policy must have to
+        affect this entry; {} means any policy write does. Entries without a
+        predicate are only dropped by key. After expiring, an entry can still
+        be read with get_stale for another stale_ttl seconds; invalidation
+        removes it outright.
+        """
+        if not self.maxsize:
+            return
+        expires_at = time.monotonic() + ttl
+        self._entries[key] = (value, expires_at, expires_at + stale_ttl, predicate)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        logger.info(f"Cached item with key: {key}, TTL: {ttl}s")
+    
+    def invalidate(self, key=None):
+        """Invalidate specific cache key or entire cache"""
+        if key:
+            if self._entries.pop(key, None) is not None:
+                logger.info(f"Invalidated cache for key: {key}")
+        else:
+            self._entries.clear()
+            logger.info("Invalidated entire cache")
+    
+    def invalidate_matching(self, *items):
+        """Invalidate entries whose predicate matches any of the given policy versions"""
+        items = [item for item in items if item]
+        stale = [
+            key for key, (_, _, _, predicate) in self._entries.items()
+            if predicate is not None and any(
+                all(item.get(name) == value for name, value in predicate.items()) for item in items
+            )
+        ]
+        for key in stale:
+            del self._entries[key]
+        logger.info(f"Invalidated {len(stale)} cache entries matching written policies")
+
+# Serialized response bodies, shared across warm invocations; DAX already caches
+# items and queries for every container, so this layer is disabled behind it
+_cache = TTLCache(maxsize=0 if dax_endpoint else CACHE_MAX_SIZE)
+
+def make_cache_key(prefix, params):
+    """Build a short, fixed-length cache key from request parameters or a raw request body"""
+    if isinstance(params, str):
+        canonical = params
     else:
-        cache.clear()
-        cache_ttl.clear()
-        logger.info("Invalidated entire cache")
+        canonical = json.dumps(params, sort_keys=True, separators=(',', ':'))
+    return f"{prefix}:{hashlib.blake2b(canonical.encode(), digest_size=16).hexdigest()}"
 
 ###################
-# Helper Classes  #
+# JSON Helpers    #
 ###################
 
-class DecimalEncoder(json.JSONEncoder):
-    """Helper class to convert DynamoDB Decimal types to JSON"""
-    def default(self, obj):
-        if isinstance(obj, Decimal):
-            return float(obj)
-        return super(DecimalEncoder, self).default(obj)#
-##################
+def decimal_default(obj):
+    """json.dumps default hook converting DynamoDB Decimal types to JSON numbers"""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+# Use orjson for request and response bodies when it is bundled with the function;
+# its JSONDecodeError subclasses json.JSONDecodeError, so handlers catch either
+try:
+    import orjson
+    
+    def json_dumps(obj):
+        """Serialize a response body to a JSON string"""
+        return orjson.dumps(obj, default=decimal_default).decode()
+    
+    json_loads = orjson.loads
+except ImportError:
+    def json_dumps(obj):
+        """Serialize a response body to a JSON string"""
+        return json.dumps(obj, default=decimal_default, separators=(',', ':'))
+    
+    json_loads = json.loads
+
+###################
+# Date Helpers    #
+###################
+
+# (epoch second, UTC date string) of the last formatted date
+_today_cache = [0, '']
+
+def today_str():
+    """Current UTC date as YYYY-MM-DD, formatted at most once per second"""
+    now = int(time.time())
+    if now != _today_cache[0]:
+        _today_cache[:] = [now, datetime.utcnow().strftime('%Y-%m-%d')]
+    return _today_cache[1]
+
+###################
 # Error Handling  #
 ###################
 
@@ -124,7 +358,7 @@ def create_error_response(status_code, error_message, error_code, headers, path=
     return {
         'statusCode': status_code,
         'headers': headers,
-        'body': json.dumps({
+        'body': json_dumps({
             "error": error_message,
             "code": error_code,
             "timestamp": datetime.utcnow().isoformat() + "Z",
@@ -139,20 +373,24 @@ def create_error_response(status_code, error_message, error_code, headers, path=
 
 def validate_uuid(value, field_name):
     """Validate UUID format"""
-    if not re.match(UUID_PATTERN, value, re.I):
+    if not UUID_RE.match(value):
         raise ValueError(f"Invalid {field_name} format. Must be a valid UUID")
     return True
 
 def validate_enum(value, valid_values, field_name):
     """Validate enum value"""
-    if value not in valid_values:
-        valid_str = ", ".join(valid_values)
+    try:
+        is_valid = value in valid_values
+    except TypeError:  # Unhashable values (lists, objects) can never match
+        is_valid = False
+    if not is_valid:
+        valid_str = ", ".join(sorted(valid_values))
         raise ValueError(f"Invalid {field_name} value: {value}. Must be one of: {valid_str}")
     return True
 
 def validate_date(value, field_name):
     """Validate date format (YYYY-MM-DD)"""
-    if not re.match(DATE_PATTERN, value):
+    if not DATE_RE.match(value):
         raise ValueError(f"Invalid {field_name} format. Use YYYY-MM-DD format")
     return True
 
@@ -170,37 +408,66 @@ def validate_number(value, field_name, min_value=None, max_value=None):
 
 def validate_version(value, field_name):
     """Validate version format (v#.#)"""
-    if not re.match(VERSION_PATTERN, value):
+    if not VERSION_RE.match(value):
         raise ValueError(f"Invalid {field_name} format: {value}. Must match pattern v#.#")
     return True
 
-def sanitize_input(value):
-    """Sanitize string input to prevent injection"""
-    if isinstance(value, str):
-        # Remove any potentially harmful characters
-        return re.sub(r'[^\w\s\-\.,;:@#$%^&*()[\]{}|/<>\'\"=+!?]', '', value)
-    return value########
-###########
+# Policy body checks shared by create and update, in the order errors are reported
+POLICY_ENUM_FIELDS = (
+    ('policy_type', VALID_POLICY_TYPES),
+    ('vehicle_type', VALID_VEHICLE_TYPES),
+    ('policy_status', VALID_POLICY_STATUSES)
+)
+POLICY_ID_FIELDS = ('policy_id', 'customer_id', 'agent_id')
+REQUIRED_POLICY_FIELDS = POLICY_ID_FIELDS + tuple(field for field, _ in POLICY_ENUM_FIELDS)
+
+def validate_policy_fields(item, partial=False):
+    """Validate policy enum and ID fields; partial only checks the fields present (updates)"""
+    for field, valid_values in POLICY_ENUM_FIELDS:
+        if not partial or field in item:
+            validate_enum(item.get(field), valid_values, field)
+    for field in POLICY_ID_FIELDS:
+        if not partial or field in item:
+            validate_uuid(item.get(field), field)
+    return True
+
+###################
 # Main Handler    #
 ###################
 
+def path_policy_id(event, match):
+    """Policy ID from API Gateway path parameters, or from the matched path"""
+    return (event.get("pathParameters") or {}).get('policy_id') or match.group('policy_id')
+
+# Routes matching OpenAPI paths exactly: (path pattern, method, handler(event, headers, path, match))
+ROUTES = [
+    (re.compile(r'^/$'), 'GET',
+     lambda event, headers, path, match: handle_root_endpoint(headers)),
+    (re.compile(r'^/items$'), 'GET',
+     lambda event, headers, path, match: handle_list_items(event.get("queryStringParameters") or {}, headers)),
+    (re.compile(r'^/items$'), 'POST',
+     lambda event, headers, path, match: handle_create_item(event.get('body'), headers, path)),
+    (re.compile(r'^/items/search$'), 'POST',
+     lambda event, headers, path, match: handle_search_items(event.get('body'), headers, path)),
+    (re.compile(r'^/items/stats$'), 'GET',
+     lambda event, headers, path, match: handle_get_stats(event.get("queryStringParameters") or {}, headers, path)),
+    # "search" and "stats" are never policy IDs, so other methods on them stay 404
+    (ITEM_PATH_RE, 'GET',
+     lambda event, headers, path, match: handle_get_item(path_policy_id(event, match), headers, path)),
+    (ITEM_PATH_RE, 'PUT',
+     lambda event, headers, path, match: handle_update_item(path_policy_id(event, match), event.get('body'), headers, path)),
+    (ITEM_PATH_RE, 'DELETE',
+     lambda event, headers, path, match: handle_delete_item(path_policy_id(event, match), headers, path))
+]
+
 def lambda_handler(event, context):
     """Main Lambda handler function matching OpenAPI schema"""
     # Log request details (sanitized)
     request_id = context.aws_request_id if context else str(uuid.uuid4())
-    logger.info(f"Request ID: {request_id}, Method: {event.get('httpMethod')}, Path: {event.get('path')}")
-    
-    headers = {
-        'Content-Type': 'application/json',
-        'Access-Control-Allow-Origin': '*',
-        'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
-        'Access-Control-Allow-Headers': 'Content-Type, Authorization, x-api-key',
-        'X-Request-ID': request_id,
-        'Strict-Transport-Security': 'max-age=31536000; includeSubDomains',
-        'X-Content-Type-Options': 'nosniff',
-        'X-XSS-Protection': '1; mode=block',
-        'Cache-Control': 'no-store'
-    }
+    path = event.get("path", "")
+    logger.info(f"Request ID: {request_id}, Method: {event.get('httpMethod')}, Path: {path}")
+    
+    headers = {**BASE_HEADERS, 'X-Request-ID': request_id}
     
     try:
         # Validate API key if required
@@ -209,39 +476,22 @@ def lambda_handler(event, context):
                 return create_error_response(401, "Unauthorized - Invalid or missing API key", "UNAUTHORIZED", headers)
         
         http_method = event.get("httpMethod")
-        path = event.get("path", "")
-        path_parameters = event.get("pathParameters") or {}
-        query_parameters = event.get("queryStringParameters") or {}
         
         # Handle OPTIONS requests for CORS
         if http_method == "OPTIONS":
             return {
                 'statusCode': 200,
                 'headers': headers,
-                'body': json.dumps({"message": "CORS preflight"})
+                'body': json_dumps({"message": "CORS preflight"})
             }
         
         # Route requests based on path and method - matching OpenAPI paths exactly
-        if path == "/" and http_method == "GET":
-            return handle_root_endpoint(headers)
-        elif path == "/items" and http_method == "GET":
-            return handle_list_items(query_parameters, headers)
-        elif path == "/items" and http_method == "POST":
-            return handle_create_item(event.get('body'), headers, path)
-        elif path.startswith("/items/") and not path.endswith("/search") and not path.endswith("/stats"):
-            policy_id = path_parameters.get('policy_id') or path.split('/')[-1]
-            if http_method == "GET":
-                return handle_get_item(policy_id, headers, path)
-            elif http_method == "PUT":
-                return handle_update_item(policy_id, event.get('body'), headers, path)
-            elif http_method == "DELETE":
-                return handle_delete_item(policy_id, headers, path)
-        elif path == "/items/search" and http_method == "POST":
-            return handle_search_items(event.get('body'), headers, path)
-        elif path == "/items/stats" and http_method == "GET":
-            return handle_get_stats(query_parameters, headers, path)
-        else:
-            return create_error_response(404, "Endpoint not found", "NOT_FOUND", headers, path)
+        for pattern, method, handler in ROUTES:
+            if method == http_method:
+                match = pattern.match(path)
+                if match:
+                    return handler(event, headers, path, match)
+        return create_error_response(404, "Endpoint not found", "NOT_FOUND", headers, path)
             
     except Exception as e:
         logger.error(f"Unhandled exception: {str(e)}", exc_info=True)
@@ -258,171 +508,329 @@ def validate_api_key(event):
     # Get valid API keys from environment variable (comma-separated)
     valid_keys = os.environ.get("VALID_API_KEYS", "").split(",")
     
-    return api_key in valid_keys#
-##################
+    return api_key in valid_keys
+
+###################
 # Endpoint Handlers #
 ###################
 
 def handle_root_endpoint(headers):
     """Handle GET / - API information matching OpenAPI schema"""
-    # Check cache first
-    cache_key = "root_endpoint"
-    cached_response = get_cached_item(cache_key)
-    if cached_response:
-        return cached_response
-    
-    response = {
+    # Static content, serialized once at cold start
+    return {
         'statusCode': 200,
         'headers': headers,
-        'body': json.dumps({
-            "message": "DynamoDB Plugin API",
-            "version": "1.0.0",
-            "endpoints": [
-                "GET /",
-                "GET /items",
-                "POST /items", 
-                "GET /items/{policy_id}",
-                "PUT /items/{policy_id}",
-                "DELETE /items/{policy_id}",
-                "POST /items/search",
-                "GET /items/stats"
-            ]
-        })
+        'body': ROOT_BODY
     }
-    
-    # Cache response for 1 hour (static content)
-    set_cached_item(cache_key, response, 3600)
-    return response
 
 def handle_list_items(query_params, headers):
     """Handle GET /items with filtering - matches OpenAPI response schema"""
     try:
         # Generate cache key based on query parameters
-        cache_key = f"list_items:{json.dumps(query_params, sort_keys=True)}"
-        cached_response = get_cached_item(cache_key)
-        if cached_response:
-            return cached_response
-        
-        # Apply filters using GSIs where possible
-        filtered_items = query_items_with_indexes(query_params)
+        cache_key = make_cache_key("list_items", query_params)
+        cached_body = _cache.get(cache_key)
+        if cached_body is not None:
+            return {'statusCode': 200, 'headers': headers, 'body': cached_body}
         
         # Apply pagination as defined in OpenAPI
-        limit = min(int(query_params.get('limit', 100)), 1000)  # Max 1000 as per schema
-        offset = max(int(query_params.get('offset', 0)), 0)
+        limit = max(min(int(query_params.get('limit', 100)), 1000), 1)  # Max 1000 as per schema
+        start_key = decode_cursor(query_params['cursor']) if query_params.get('cursor') else None
+        fields = parse_fields(query_params['fields']) if query_params.get('fields') else None
         
-        total_count = len(filtered_items)
-        paginated_items = filtered_items[offset:offset + limit]
-        has_more = (offset + limit) < total_count
+        # Read one page, applying filters using GSIs where possible
+        paginated_items, next_key = query_items_with_indexes(query_params, limit, start_key, fields)
+        if fields:
+            # Drop attributes that were only projected for filtering or the cursor
+            paginated_items = [{name: item[name] for name in fields if name in item} for item in paginated_items]
         
         # Return response matching OpenAPI schema exactly
-        response = {
-            'statusCode': 200,
-            'headers': headers,
-            'body': json.dumps({
-                "items": paginated_items,
-                "total_count": total_count,
-                "filtered_count": len(paginated_items),
-                "has_more": has_more
-            }, cls=DecimalEncoder)
-        }
+        body = json_dumps({
+            "items": paginated_items,
+            "filtered_count": len(paginated_items),
+            "has_more": next_key is not None,
+            "next_cursor": encode_cursor(next_key)
+        })
         
-        # Cache response for 30 seconds (adjustable based on data volatility)
-        set_cached_item(cache_key, response, 30)
-        return response
+        # Cache response for 30 seconds (adjustable based on data volatility);
+        # only writes to policies passing its exact-match filters evict it
+        predicate = {name: query_params[name] for name in CACHE_PREDICATE_FIELDS if query_params.get(name)}
+        _cache.set(cache_key, body, 30, predicate)
+        return {'statusCode': 200, 'headers': headers, 'body': body}
         
     except ValueError as e:
         return create_error_response(400, f"Invalid parameter value: {str(e)}", "VALIDATION_ERROR", headers)
     except Exception as e:
         logger.error(f"Error in handle_list_items: {str(e)}", exc_info=True)
-        return create_error_response(500, f"Failed to retrieve items", "SCAN_ERROR", headers)def que
-ry_items_with_indexes(query_params):
-    """Query items using GSIs where possible, falling back to scan with filters"""
+        return create_error_response(500, f"Failed to retrieve items", "SCAN_ERROR", headers)
+
+def query_items_with_indexes(query_params, limit, start_key=None, fields=None):
+    """Read one page of items using GSIs where possible, pushing filters down to DynamoDB
+    
+    Returns the items and the key to resume from, or None once results are exhausted.
+    When fields is given, only those attributes (plus any the read needs) are fetched.
+    """
     try:
-        # Check if we can use GSI for state
-        if 'state' in query_params and not any(k for k in query_params.keys() if k != 'state' and k not in ['limit', 'offset']):
-            state = query_params['state']
-            validate_enum(state, VALID_STATES, 'state')
-            
-            # Use StateIndex GSI if it exists
-            try:
-                response = table.query(
-                    IndexName='StateIndex',
-                    KeyConditionExpression=Key('state').eq(state)
-                )
-                return response.get('Items', [])
-            except ClientError as e:
-                # If GSI doesn't exist, log and fall back to scan
-                logger.warning(f"StateIndex GSI not found, falling back to scan: {str(e)}")
-        
-        # Check if we can use GSI for policy_status
-        if 'policy_status' in query_params and not any(k for k in query_params.keys() if k != 'policy_status' and k not in ['limit', 'offset']):
-            status = query_params['policy_status']
-            validate_enum(status, VALID_POLICY_STATUSES, 'policy_status')
-            
-            # Use PolicyStatusIndex GSI if it exists
+        # Use the StateIndex or PolicyStatusIndex GSI when its key is filtered on;
+        # a FilterExpression may not reference the key attribute of the query
+        key_attribute, index_name = next(
+            ((attribute, index) for attribute, index in GSI_KEYS if query_params.get(attribute)),
+            (None, None)
+        )
+        filter_expression = build_filter_expression(query_params, exclude=key_attribute)
+        predicates = build_range_predicates(query_params)
+        
+        # Attributes the range predicates and the cursor need, on top of any requested fields
+        required = ['policy_id']
+        if query_params.get('premium_min') or query_params.get('premium_max'):
+            required.append('premium_amount')
+        if query_params.get('coverage_limit_min') or query_params.get('coverage_limit_max'):
+            required.append('coverage_limit')
+        
+        if index_name:
+            query_kwargs = {
+                'IndexName': index_name,
+                'KeyConditionExpression': Key(key_attribute).eq(query_params[key_attribute])
+            }
+            if filter_expression is not None:
+                query_kwargs['FilterExpression'] = filter_expression
+            if fields:
+                query_kwargs.update(build_projection(fields, required + [key_attribute]))
             try:
-                response = table.query(
-                    IndexName='PolicyStatusIndex',
-                    KeyConditionExpression=Key('policy_status').eq(status)
-                )
-                return response.get('Items', [])
+                return read_page(get_table().query, predicates, limit, start_key,
+                                 ('policy_id', key_attribute), **query_kwargs)
             except ClientError as e:
                 # If GSI doesn't exist, log and fall back to scan
-                logger.warning(f"PolicyStatusIndex GSI not found, falling back to scan: {str(e)}")
-        
-        # Fall back to scan with filters for complex queries
-        response = table.scan()
-        items = response['Items']
-        
-        # Continue scan if there are more items (pagination within DynamoDB)
-        while 'LastEvaluatedKey' in response:
-            response = table.scan(ExclusiveStartKey=response['LastEvaluatedKey'])
-            items.extend(response['Items'])
-        
-        # Apply filters
-        return apply_filters(items, query_params)
-        
+                if not is_missing_index_error(e):
+                    raise
+                logger.warning(f"{index_name} GSI not found, falling back to scan: {str(e)}")
+                filter_expression = build_filter_expression(query_params)
+        
+        # Fall back to a filtered scan for everything else
+        scan_kwargs = {}
+        if filter_expression is not None:
+            scan_kwargs['FilterExpression'] = filter_expression
+        if fields:
+            scan_kwargs.update(build_projection(fields, required))
+        return read_page(get_table().scan, predicates, limit, start_key, ('policy_id',), **scan_kwargs)
+        
+    except ValueError:
+        raise
     except Exception as e:
         logger.error(f"Error in query_items_with_indexes: {str(e)}", exc_info=True)
-        raisedef app
-ly_filters(items, query_params):
-    """Apply filtering logic to items based on query parameters - validates against OpenAPI schema"""
-    filtered_items = items
-    
-    # State filter - validate against OpenAPI enum
-    if query_params.get('state'):
-        state = query_params['state']
-        validate_enum(state, VALID_STATES, 'state')
-        filtered_items = [item for item in filtered_items if item.get('state') == state]
-    
-    # Policy status filter - validate against OpenAPI enum
-    if query_params.get('policy_status'):
-        status = query_params['policy_status']
-        validate_enum(status, VALID_POLICY_STATUSES, 'policy_status')
-        filtered_items = [item for item in filtered_items if item.get('policy_status') == status]
-    
-    # Policy type filter - validate against OpenAPI enum
-    if query_params.get('policy_type'):
-        policy_type = query_params['policy_type']
-        validate_enum(policy_type, VALID_POLICY_TYPES, 'policy_type')
-        filtered_items = [item for item in filtered_items if item.get('policy_type') == policy_type]
-    
-    # Vehicle type filter - validate against OpenAPI enum
-    if query_params.get('vehicle_type'):
-        vehicle_type = query_params['vehicle_type']
-        validate_enum(vehicle_type, VALID_VEHICLE_TYPES, 'vehicle_type')
-        filtered_items = [item for item in filtered_items if item.get('vehicle_type') == vehicle_type]
-    
-    # Risk rating filter - validate against OpenAPI enum
-    if query_params.get('risk_rating'):
-        risk_rating = query_params['risk_rating']
-        validate_enum(risk_rating, VALID_RISK_RATINGS, 'risk_rating')
-        filtered_items = [item for item in filtered_items if item.get('risk_rating') == risk_rating]
+        raise
+
+def is_missing_index_error(error):
+    """Check whether a ClientError reports that the queried GSI does not exist"""
+    details = error.response.get('Error', {})
+    return (details.get('Code') == 'ValidationException'
+            and 'specified index' in details.get('Message', ''))
+
+def read_page(operation, predicates, limit, start_key, key_attributes, **kwargs):
+    """Read up to limit matching items from a table query or scan
+    
+    DynamoDB applies Limit before filtering, so Limit is only sent when
+    nothing filters; otherwise full pages are read until enough items match
+    or the results run out.
+    """
+    if 'FilterExpression' not in kwargs and not predicates:
+        kwargs['Limit'] = limit
+    items = []
+    client_cursor = start_key is not None
+    while True:
+        if start_key:
+            kwargs['ExclusiveStartKey'] = start_key
+        try:
+            response = operation(**kwargs)
+        except ClientError as e:
+            # Only the first key comes from the client; later ones are DynamoDB's own
+            if (client_cursor and e.response.get('Error', {}).get('Code') == 'ValidationException'
+                    and not is_missing_index_error(e)):
+                raise ValueError("Invalid cursor")
+            raise
+        client_cursor = False
+        items.extend(apply_filters(response['Items'], predicates))
+        start_key = response.get('LastEvaluatedKey')
+        
+        if len(items) > limit:
+            # Resume after the last item returned rather than the last item read
+            items = items[:limit]
+            start_key = {attribute: items[-1][attribute] for attribute in key_attributes}
+        if len(items) >= limit or not start_key:
+            return items, start_key
+
+def parse_fields(fields_param):
+    """Parse a comma-separated fields parameter into InsurancePolicy attribute names"""
+    fields = [name.strip() for name in fields_param.split(',') if name.strip()]
+    for name in fields:
+        validate_enum(name, POLICY_ATTRIBUTES, 'fields')
+    return fields
+
+def build_projection(fields, required):
+    """Build ProjectionExpression arguments for the requested and required attributes"""
+    # Placeholders avoid reserved words such as "state"; the "#p" prefix keeps
+    # them apart from the "#n" names boto3 generates for condition expressions
+    names = sorted(set(fields) | set(required))
+    return {
+        'ProjectionExpression': ', '.join(f"#p{i}" for i in range(len(names))),
+        'ExpressionAttributeNames': {f"#p{i}": name for i, name in enumerate(names)}
+    }
+
+def encode_cursor(key):
+    """Encode a DynamoDB LastEvaluatedKey as an opaque pagination cursor"""
+    if not key:
+        return None
+    return base64.urlsafe_b64encode(json_dumps(key).encode()).decode()
+
+def decode_cursor(cursor):
+    """Decode a pagination cursor back into a DynamoDB ExclusiveStartKey"""
+    try:
+        key = json_loads(base64.urlsafe_b64decode(cursor.encode()))
+    except ValueError:
+        raise ValueError("Invalid cursor")
+    if not isinstance(key, dict):
+        raise ValueError("Invalid cursor")
+    return key
+
+def build_client_filter(filter_expression):
+    """Render a boto3 condition as FilterExpression arguments for the low-level client"""
+    if filter_expression is None:
+        return {}
+    built = ConditionExpressionBuilder().build_expression(filter_expression)
+    return {
+        'FilterExpression': built.condition_expression,
+        'ExpressionAttributeNames': built.attribute_name_placeholders,
+        'ExpressionAttributeValues': {
+            placeholder: serializer.serialize(value)
+            for placeholder, value in built.attribute_value_placeholders.items()
+        }
+    }
+
+def iter_pages(operation, **kwargs):
+    """Yield every item from a paginated table query or scan, holding one page at a time"""
+    while True:
+        response = operation(**kwargs)
+        yield from response.get('Items', [])
+        if 'LastEvaluatedKey' not in response:
+            return
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def iter_segment(segment, total_segments, **scan_kwargs):
+    """Yield every item in one segment of a parallel scan, holding one page at a time"""
+    # The low-level client is thread-safe, unlike the shared Table resource
+    kwargs = {'TableName': table_name, 'Segment': segment, 'TotalSegments': total_segments, **scan_kwargs}
+    while True:
+        response = dynamodb_client.scan(**kwargs)
+        for item in response['Items']:
+            yield {name: deserializer.deserialize(value) for name, value in item.items()}
+        
+        # Continue scan if there are more items (pagination within DynamoDB)
+        if 'LastEvaluatedKey' not in response:
+            return
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def parallel_scan(reduce_segment=list, total_segments=SCAN_SEGMENTS, **scan_kwargs):
+    """Scan the whole table as parallel segments, one thread per segment
+    
+    Each segment's items are streamed into reduce_segment, so only what it
+    keeps stays in memory. Extra keyword arguments (such as a FilterExpression)
+    are passed to every scan request. Returns the per-segment results in
+    segment order.
+    """
+    with ThreadPoolExecutor(max_workers=total_segments) as executor:
+        return list(executor.map(
+            lambda segment: reduce_segment(iter_segment(segment, total_segments, **scan_kwargs)),
+            range(total_segments)
+        ))
+
+def first_page_limit(kwargs, size):
+    """Add a page Limit when no FilterExpression can drop items, so the first read stops at size"""
+    if 'FilterExpression' in kwargs:
+        return kwargs
+    return {**kwargs, 'Limit': size}
+
+def count_pages(operation, **kwargs):
+    """Count the items a paginated table query or scan matches, without returning them"""
+    count = 0
+    while True:
+        response = operation(Select='COUNT', **kwargs)
+        count += response['Count']
+        if 'LastEvaluatedKey' not in response:
+            return count
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def count_items(total_segments=SCAN_SEGMENTS, **scan_kwargs):
+    """Count the items matching a scan as parallel segments, without returning them"""
+    def count_segment(segment):
+        kwargs = {'TableName': table_name, 'Segment': segment, 'TotalSegments': total_segments,
+                  'Select': 'COUNT', **scan_kwargs}
+        count = 0
+        while True:
+            response = dynamodb_client.scan(**kwargs)
+            count += response['Count']
+            if 'LastEvaluatedKey' not in response:
+                return count
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    
+    with ThreadPoolExecutor(max_workers=total_segments) as executor:
+        return sum(executor.map(count_segment, range(total_segments)))
+
+def build_filter_expression(query_params, exclude=None):
+    """Build a DynamoDB FilterExpression from query parameters - validates against OpenAPI schema
+    
+    Returns None when no server-side filter applies. The attribute named by
+    exclude is validated but left out, for use as a query key condition.
+    """
+    conditions = []
+    
+    # Exact-match filters - validate against OpenAPI enums
+    for field_name, valid_values in ENUM_FILTERS:
+        if query_params.get(field_name):
+            value = query_params[field_name]
+            validate_enum(value, valid_values, field_name)
+            conditions.append((field_name, Attr(field_name).eq(value)))
     
     # Deductible filter
     if query_params.get('deductible'):
-        deductible = query_params['deductible']
-        filtered_items = [item for item in filtered_items if item.get('deductible') == deductible]
+        conditions.append(('deductible', Attr('deductible').eq(query_params['deductible'])))
+    
+    # Date range filters - ISO dates compare correctly as strings
+    for param_name, field_name, operator in DATE_RANGE_FILTERS:
+        if query_params.get(param_name):
+            date_value = query_params[param_name]
+            validate_date(date_value, param_name)
+            
+            if operator == '>=':
+                conditions.append((field_name, Attr(field_name).gte(date_value)))
+            else:  # operator == '<='
+                conditions.append((field_name, Attr(field_name).lte(date_value)))
+    
+    # Agent and customer ID filters - validate UUID format
+    for field_name in ('agent_id', 'customer_id'):
+        if query_params.get(field_name):
+            value = query_params[field_name]
+            validate_uuid(value, field_name)
+            conditions.append((field_name, Attr(field_name).eq(value)))
+    
+    # Product version filter - validate pattern as per OpenAPI schema
+    if query_params.get('product_version'):
+        product_version = query_params['product_version']
+        validate_version(product_version, 'product_version')
+        conditions.append(('product_version', Attr('product_version').eq(product_version)))
+    
+    filter_expression = None
+    for field_name, condition in conditions:
+        if field_name == exclude:
+            continue
+        filter_expression = condition if filter_expression is None else filter_expression & condition
+    return filter_expression
+
+def build_range_predicates(query_params):
+    """Build item predicates for the currency range filters - validates against OpenAPI schema
+    
+    Premium and coverage amounts are stored as "$1,000" strings, so their
+    ranges cannot be compared by DynamoDB and are checked here instead.
+    """
+    predicates = []
     
     # Premium range filters - validate minimum values as per OpenAPI schema
     if query_params.get('premium_min') or query_params.get('premium_max'):
@@ -432,15 +840,9 @@ ly_filters(items, query_params):
         validate_number(premium_min, 'premium_min', 0)
         validate_number(premium_max, 'premium_max', 0)
         
-        def in_premium_range(item):
-            try:
-                premium = parse_currency_amount(item.get('premium_amount', 0))
-                return premium_min <= premium <= premium_max
-            except (ValueError, TypeError):
-                return False
-        
-        filtered_items = [item for item in filtered_items if in_premium_range(item)]    # 
-Coverage limit range filters - validate minimum values
+        predicates.append(lambda item: currency_in_range(item.get('premium_amount', 0), premium_min, premium_max))
+    
+    # Coverage limit range filters - validate minimum values
     if query_params.get('coverage_limit_min') or query_params.get('coverage_limit_max'):
         coverage_min = float(query_params.get('coverage_limit_min', 0))
         coverage_max = float(query_params.get('coverage_limit_max', float('inf')))
@@ -448,112 +850,100 @@ Coverage limit range filters - validate minimum values
         validate_number(coverage_min, 'coverage_limit_min', 0)
         validate_number(coverage_max, 'coverage_limit_max', 0)
         
-        def in_coverage_range(item):
-            try:
-                coverage = parse_currency_amount(item.get('coverage_limit', '0'))
-                return coverage_min <= coverage <= coverage_max
-            except (ValueError, TypeError):
-                return False
-        
-        filtered_items = [item for item in filtered_items if in_coverage_range(item)]
-    
-    # Date range filters - validate date format
-    date_fields = [
-        ('start_date_from', 'start_date', '>='),
-        ('start_date_to', 'start_date', '<='),
-        ('end_date_from', 'end_date', '>='),
-        ('end_date_to', 'end_date', '<=')
-    ]
+        predicates.append(lambda item: currency_in_range(item.get('coverage_limit', '0'), coverage_min, coverage_max))
     
-    for param_name, field_name, operator in date_fields:
-        if query_params.get(param_name):
-            date_value = query_params[param_name]
-            validate_date(date_value, param_name)
-            
-            if operator == '>=':
-                filtered_items = [item for item in filtered_items 
-                                 if item.get(field_name, '') >= date_value]
-            else:  # operator == '<='
-                filtered_items = [item for item in filtered_items 
-                                 if item.get(field_name, '') <= date_value]
-    
-    # Compliance filter - validate against OpenAPI enum
-    if query_params.get('is_compliant'):
-        is_compliant = query_params['is_compliant']
-        validate_enum(is_compliant, VALID_COMPLIANCE_VALUES, 'is_compliant')
-        filtered_items = [item for item in filtered_items if item.get('is_compliant') == is_compliant]
-    
-    # Agent ID filter - validate UUID format
-    if query_params.get('agent_id'):
-        agent_id = query_params['agent_id']
-        validate_uuid(agent_id, 'agent_id')
-        filtered_items = [item for item in filtered_items if item.get('agent_id') == agent_id]
-    
-    # Customer ID filter - validate UUID format
-    if query_params.get('customer_id'):
-        customer_id = query_params['customer_id']
-        validate_uuid(customer_id, 'customer_id')
-        filtered_items = [item for item in filtered_items if item.get('customer_id') == customer_id]
+    return predicates
+
+def apply_filters(items, predicates):
+    """Keep the items that satisfy every predicate, in a single pass"""
+    if not predicates:
+        return items
+    return [item for item in items if all(predicate(item) for predicate in predicates)]
+
+def iter_matching(items, predicates):
+    """Lazily yield the items that satisfy every predicate"""
+    return (item for item in items if all(predicate(item) for predicate in predicates))
+
+def take_window(items, size, sort_key=None, reverse=False):
+    """Count an iterable of items and keep only the first size of them
     
-    # Product version filter - validate pattern as per OpenAPI schema
-    if query_params.get('product_version'):
-        product_version = query_params['product_version']
-        validate_version(product_version, 'product_version')
-        filtered_items = [item for item in filtered_items if item.get('product_version') == product_version]
+    With sort_key the kept items are the first size in sort order (a
+    bounded heap selection, equivalent to a stable sort then slice).
+    Returns (total count, kept items).
+    """
+    total = 0
+    def counted():
+        nonlocal total
+        for item in items:
+            total += 1
+            yield item
     
-    return filtered_items
+    remaining = counted()
+    if size <= 0:
+        window = []
+    elif sort_key is None:
+        window = list(islice(remaining, size))
+    else:
+        select = heapq.nlargest if reverse else heapq.nsmallest
+        window = select(size, remaining, key=sort_key)
+    deque(remaining, maxlen=0)  # count anything left without keeping it
+    return total, window
+
+def currency_in_range(amount, low, high):
+    """Check a stored currency amount against an inclusive range"""
+    try:
+        return low <= parse_currency_amount(amount) <= high
+    except (ValueError, TypeError):
+        return False
 
+@lru_cache(maxsize=CURRENCY_CACHE_SIZE)
 def parse_currency_amount(amount_str):
-    """Parse currency string to float (handles $1,000 format)"""
+    """Parse currency string to float (handles $1,000 format)
+    
+    Memoized: policies share a small set of amounts, and range filters,
+    sorting and stats would otherwise re-parse the same strings per item.
+    """
     if not amount_str:
         return 0.0
     # Remove currency symbols and commas
-    cleaned = re.sub(r'[$,]', '', str(amount_str))
-    return float(cleaned)def han
-dle_create_item(body, headers, path):
+    cleaned = CURRENCY_RE.sub('', str(amount_str))
+    return float(cleaned)
+
+def handle_create_item(body, headers, path):
     """Handle POST /items - Create new policy matching OpenAPI CreateResponse schema"""
     try:
         if not body:
             return create_error_response(400, "Request body is required", "MISSING_BODY", headers, path)
         
-        item = json.loads(body)
+        item = json_loads(body)
         
         # Validate required fields as defined in OpenAPI schema
-        required_fields = ['policy_id', 'customer_id', 'agent_id', 'policy_type', 'vehicle_type', 'policy_status']
-        for field in required_fields:
+        for field in REQUIRED_POLICY_FIELDS:
             if field not in item:
                 return create_error_response(400, f"Missing required field: {field}", "VALIDATION_ERROR", headers, path)
         
-        # Validate enum values against OpenAPI schema
-        validate_enum(item.get('policy_type'), VALID_POLICY_TYPES, 'policy_type')
-        validate_enum(item.get('vehicle_type'), VALID_VEHICLE_TYPES, 'vehicle_type')
-        validate_enum(item.get('policy_status'), VALID_POLICY_STATUSES, 'policy_status')
-        
-        # Validate UUID format for IDs
-        validate_uuid(item.get('policy_id'), 'policy_id')
-        validate_uuid(item.get('customer_id'), 'customer_id')
-        validate_uuid(item.get('agent_id'), 'agent_id')
+        # Validate enum values and UUID formats against OpenAPI schema
+        validate_policy_fields(item)
         
         # Add timestamp
-        item['last_updated'] = datetime.utcnow().strftime('%Y-%m-%d')
-        
-        # Sanitize inputs to prevent injection
-        for key, value in item.items():
-            item[key] = sanitize_input(value)
+        item['last_updated'] = today_str()
         
-        table.put_item(Item=item)
+        # ALL_OLD returns the replaced policy, if this ID already existed
+        previous = get_table().put_item(Item=item, ReturnValues='ALL_OLD').get('Attributes')
         
         # Invalidate relevant caches
-        invalidate_cache()  # For simplicity, invalidate all caches on write operations
+        _cache.invalidate(f"policy:{item['policy_id']}")
+        _cache.invalidate_matching(previous, item)
+        record_stats_change(previous, item)
         
         # Return response matching OpenAPI CreateResponse schema
         return {
             'statusCode': 201,
             'headers': headers,
-            'body': json.dumps({
+            'body': json_dumps({
                 "message": "Policy created successfully",
                 "policy": item
-            }, cls=DecimalEncoder)
+            })
         }
         
     except json.JSONDecodeError:
@@ -565,8 +955,9 @@ dle_create_item(body, headers, path):
         return create_error_response(500, f"Database error", "CREATE_ERROR", headers, path)
     except Exception as e:
         logger.error(f"Error in handle_create_item: {str(e)}", exc_info=True)
-        return create_error_response(500, f"Failed to create item", "CREATE_ERROR", headers, path)def handle
-_get_item(policy_id, headers, path):
+        return create_error_response(500, f"Failed to create item", "CREATE_ERROR", headers, path)
+
+def handle_get_item(policy_id, headers, path):
     """Handle GET /items/{policy_id} - Get single policy matching OpenAPI schema"""
     try:
         if not policy_id:
@@ -577,25 +968,21 @@ _get_item(policy_id, headers, path):
         
         # Check cache first
         cache_key = f"policy:{policy_id}"
-        cached_response = get_cached_item(cache_key)
-        if cached_response:
-            return cached_response
+        cached_body = _cache.get(cache_key)
+        if cached_body is not None:
+            return {'statusCode': 200, 'headers': headers, 'body': cached_body}
         
-        response = table.get_item(Key={'policy_id': policy_id})
+        response = get_table().get_item(Key={'policy_id': policy_id})
         
         if 'Item' not in response:
             return create_error_response(404, "Policy not found", "NOT_FOUND", headers, path)
         
         # Return single InsurancePolicy object as per OpenAPI schema
-        result = {
-            'statusCode': 200,
-            'headers': headers,
-            'body': json.dumps(response['Item'], cls=DecimalEncoder)
-        }
+        body = json_dumps(response['Item'])
         
         # Cache individual policy for 30 seconds
-        set_cached_item(cache_key, result, 30)
-        return result
+        _cache.set(cache_key, body, 30)
+        return {'statusCode': 200, 'headers': headers, 'body': body}
         
     except ValueError as e:
         return create_error_response(400, str(e), "VALIDATION_ERROR", headers, path)
@@ -604,8 +991,9 @@ _get_item(policy_id, headers, path):
         return create_error_response(500, f"Database error", "GET_ERROR", headers, path)
     except Exception as e:
         logger.error(f"Error in handle_get_item: {str(e)}", exc_info=True)
-        return create_error_response(500, f"Failed to retrieve item", "GET_ERROR", headers, path)def 
-handle_update_item(policy_id, body, headers, path):
+        return create_error_response(500, f"Failed to retrieve item", "GET_ERROR", headers, path)
+
+def handle_update_item(policy_id, body, headers, path):
     """Handle PUT /items/{policy_id} - Update policy matching OpenAPI UpdateResponse schema"""
     try:
         if not policy_id:
@@ -617,50 +1005,38 @@ handle_update_item(policy_id, body, headers, path):
         if not body:
             return create_error_response(400, "Request body is required", "MISSING_BODY", headers, path)
         
-        item = json.loads(body)
+        item = json_loads(body)
         item['policy_id'] = policy_id  # Ensure policy_id matches path parameter
-        item['last_updated'] = datetime.utcnow().strftime('%Y-%m-%d')
-        
-        # Check if item exists first
-        existing_response = table.get_item(Key={'policy_id': policy_id})
-        if 'Item' not in existing_response:
-            return create_error_response(404, "Policy not found", "NOT_FOUND", headers, path)
-        
-        # Validate enum values if provided
-        if 'policy_type' in item:
-            validate_enum(item['policy_type'], VALID_POLICY_TYPES, 'policy_type')
+        item['last_updated'] = today_str()
         
-        if 'vehicle_type' in item:
-            validate_enum(item['vehicle_type'], VALID_VEHICLE_TYPES, 'vehicle_type')
+        # Validate enum values and UUID formats if provided
+        validate_policy_fields(item, partial=True)
         
-        if 'policy_status' in item:
-            validate_enum(item['policy_status'], VALID_POLICY_STATUSES, 'policy_status')
-        
-        # Validate UUID format for IDs
-        if 'customer_id' in item:
-            validate_uuid(item['customer_id'], 'customer_id')
-        
-        if 'agent_id' in item:
-            validate_uuid(item['agent_id'], 'agent_id')
-        
-        # Sanitize inputs to prevent injection
-        for key, value in item.items():
-            item[key] = sanitize_input(value)
-        
-        table.put_item(Item=item)
+        # Only replace an existing policy; the condition fails with a 404 below otherwise
+        try:
+            previous = get_table().put_item(
+                Item=item,
+                ConditionExpression=Attr('policy_id').exists(),
+                ReturnValues='ALL_OLD'
+            )['Attributes']
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                return create_error_response(404, "Policy not found", "NOT_FOUND", headers, path)
+            raise
         
         # Invalidate relevant caches
-        invalidate_cache(f"policy:{policy_id}")  # Invalidate specific policy cache
-        invalidate_cache()  # For simplicity, invalidate all list caches
+        _cache.invalidate(f"policy:{policy_id}")  # Invalidate specific policy cache
+        _cache.invalidate_matching(previous, item)  # Caches the old or new version affects
+        record_stats_change(previous, item)
         
         # Return response matching OpenAPI UpdateResponse schema
         return {
             'statusCode': 200,
             'headers': headers,
-            'body': json.dumps({
+            'body': json_dumps({
                 "message": "Policy updated successfully",
                 "policy": item
-            }, cls=DecimalEncoder)
+            })
         }
         
     except json.JSONDecodeError:
@@ -672,8 +1048,9 @@ handle_update_item(policy_id, body, headers, path):
         return create_error_response(500, f"Database error", "UPDATE_ERROR", headers, path)
     except Exception as e:
         logger.error(f"Error in handle_update_item: {str(e)}", exc_info=True)
-        return create_error_response(500, f"Failed to update item", "UPDATE_ERROR", headers, path)def ha
-ndle_delete_item(policy_id, headers, path):
+        return create_error_response(500, f"Failed to update item", "UPDATE_ERROR", headers, path)
+
+def handle_delete_item(policy_id, headers, path):
     """Handle DELETE /items/{policy_id} - Delete policy matching OpenAPI schema"""
     try:
         if not policy_id:
@@ -682,16 +1059,22 @@ ndle_delete_item(policy_id, headers, path):
         # Validate UUID format
         validate_uuid(policy_id, 'policy_id')
         
-        # Check if item exists
-        existing_response = table.get_item(Key={'policy_id': policy_id})
-        if 'Item' not in existing_response:
-            return create_error_response(404, "Policy not found", "NOT_FOUND", headers, path)
-        
-        table.delete_item(Key={'policy_id': policy_id})
+        # Delete only if the policy exists; the condition fails with a 404 below otherwise
+        try:
+            previous = get_table().delete_item(
+                Key={'policy_id': policy_id},
+                ConditionExpression=Attr('policy_id').exists(),
+                ReturnValues='ALL_OLD'
+            )['Attributes']
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                return create_error_response(404, "Policy not found", "NOT_FOUND", headers, path)
+            raise
         
         # Invalidate relevant caches
-        invalidate_cache(f"policy:{policy_id}")  # Invalidate specific policy cache
-        invalidate_cache()  # For simplicity, invalidate all list caches
+        _cache.invalidate(f"policy:{policy_id}")  # Invalidate specific policy cache
+        _cache.invalidate_matching(previous)  # Caches the deleted policy affects
+        record_stats_change(previous, None)
         
         # Return 204 No Content as per OpenAPI schema
         return {
@@ -707,130 +1090,190 @@ ndle_delete_item(policy_id, headers, path):
         return create_error_response(500, f"Database error", "DELETE_ERROR", headers, path)
     except Exception as e:
         logger.error(f"Error in handle_delete_item: {str(e)}", exc_info=True)
-        return create_error_response(500, f"Failed to delete item", "DELETE_ERROR", headers, path)def h
-andle_search_items(body, headers, path):
+        return create_error_response(500, f"Failed to delete item", "DELETE_ERROR", headers, path)
+
+def handle_search_items(body, headers, path):
     """Handle POST /items/search - Advanced search matching OpenAPI SearchResponse schema"""
     try:
         if not body:
             return create_error_response(400, "Request body is required", "MISSING_BODY", headers, path)
         
-        search_request = json.loads(body)
+        # Key the cache on the raw body, so repeated identical requests skip parsing
+        cache_key = make_cache_key("search", body)
+        cached_body = _cache.get(cache_key)
+        if cached_body is not None:
+            return {'statusCode': 200, 'headers': headers, 'body': cached_body}
         
-        # Generate cache key based on search request
-        cache_key = f"search:{json.dumps(search_request, sort_keys=True)}"
-        cached_response = get_cached_item(cache_key)
-        if cached_response:
-            return cached_response
+        search_request = json_loads(body)
         
         start_time = datetime.utcnow()
         
-        # Get all items using optimized query if possible
-        filters = search_request.get('filters', {})
-        filtered_items = apply_advanced_filters(filters)
-        
-        # Apply sorting
-        sort_config = search_request.get('sort', {})
-        if sort_config.get('field'):
-            filtered_items = sort_items(filtered_items, sort_config)
-        
         # Apply pagination
         pagination = search_request.get('pagination', {})
         limit = min(pagination.get('limit', 100), 1000)  # Max 1000 as per schema
         offset = max(pagination.get('offset', 0), 0)
         
-        total_count = len(filtered_items)
-        paginated_items = filtered_items[offset:offset + limit]
+        # Apply sorting while reading, keeping only the items up to the requested page
+        sort_key, reverse = get_sort_key(search_request.get('sort', {}))
+        
+        # Get matching items using optimized query if possible
+        filters = search_request.get('filters', {})
+        total_count, window = apply_advanced_filters(filters, search_request.get('policy_ids'),
+                                                     offset + limit, sort_key, reverse)
+        paginated_items = window[offset:]
         
         # Calculate execution time
         execution_time = (datetime.utcnow() - start_time).total_seconds() * 1000
         
         # Return response matching OpenAPI SearchResponse schema exactly
-        response = {
-            'statusCode': 200,
-            'headers': headers,
-            'body': json.dumps({
-                "items": paginated_items,
-                "total_count": total_count,
-                "returned_count": len(paginated_items),
-                "has_more": (offset + limit) < total_count,
-                "search_metadata": {
-                    "execution_time_ms": round(execution_time, 2),
-                    "filters_applied": list(filters.keys())
-                }
-            }, cls=DecimalEncoder)
-        }
+        body = json_dumps({
+            "items": paginated_items,
+            "total_count": total_count,
+            "returned_count": len(paginated_items),
+            "has_more": (offset + limit) < total_count,
+            "search_metadata": {
+                "execution_time_ms": round(execution_time, 2),
+                "filters_applied": list(filters.keys())
+            }
+        })
         
-        # Cache search results for 30 seconds
-        set_cached_item(cache_key, response, 30)
-        return response
+        # Cache search results for 30 seconds, or 60 if DynamoDB is unavailable; any write may change them
+        _cache.set(cache_key, body, 30, predicate={}, stale_ttl=30)
+        return {'statusCode': 200, 'headers': headers, 'body': body}
         
     except json.JSONDecodeError:
         return create_error_response(400, "Invalid JSON in request body", "INVALID_JSON", headers, path)
     except ValueError as e:
         return create_error_response(400, str(e), "VALIDATION_ERROR", headers, path)
+    except ClientError as e:
+        # Serve recently expired results rather than failing while DynamoDB is throttling
+        stale_body = _cache.get_stale(cache_key)
+        if stale_body is not None:
+            logger.warning(f"DynamoDB error in handle_search_items, serving stale results: {str(e)}")
+            return {'statusCode': 200, 'headers': headers, 'body': stale_body}
+        logger.error(f"DynamoDB error in handle_search_items: {str(e)}", exc_info=True)
+        return create_error_response(500, f"Search failed", "SEARCH_ERROR", headers, path)
     except Exception as e:
         logger.error(f"Error in handle_search_items: {str(e)}", exc_info=True)
-        return create_error_response(500, f"Search failed", "SEARCH_ERROR", headers, path)def 
-apply_advanced_filters(filters):
-    """Apply advanced filtering logic for search endpoint with optimized queries where possible"""
+        return create_error_response(500, f"Search failed", "SEARCH_ERROR", headers, path)
+
+def apply_advanced_filters(filters, policy_ids, size, sort_key=None, reverse=False):
+    """Apply advanced filtering logic for search endpoint with optimized queries where possible
+    
+    Returns the total number of matching items and the first size of them,
+    in sort order when sort_key is given.
+    """
+    def select(items):
+        return take_window(items, size, sort_key, reverse)
+    
+    if policy_ids is not None:
+        if not isinstance(policy_ids, list) or len(policy_ids) > MAX_SEARCH_POLICY_IDS:
+            raise ValueError(f"policy_ids must be an array of at most {MAX_SEARCH_POLICY_IDS} policy IDs")
+        for policy_id in policy_ids:
+            validate_uuid(policy_id, 'policy_id')
+        
+        # Fetch the requested policies directly instead of scanning; BatchGetItem
+        # cannot filter, so every filter is checked here
+        predicates = build_search_predicates(filters)
+        return select(iter_matching(batch_get_policies(policy_ids), predicates))
+    
+    # Validate every filter before reading anything; DynamoDB evaluates all but
+    # the currency ranges, which are checked on the items it returns
+    filter_expression = build_search_filter_expression(filters)
+    predicates = build_search_range_predicates(filters)
+    
+    # Without a sort or Python-side filters, only the first size matches in table
+    # order are read; DynamoDB counts the rest with Select='COUNT' without returning them
+    read_first = sort_key is None and not predicates and size > 0
+    
     # Try to use GSIs for efficient filtering
-    if filters.get('states') and len(filters.get('states')) == 1 and len(filters) == 1:
-        # If only filtering by a single state, try to use StateIndex GSI
-        state = filters['states'][0]
-        validate_enum(state, VALID_STATES, 'state')
+    states = filters.get('states')
+    if states and len(states) == 1:
+        # A single state can be read from the StateIndex GSI, with the other filters applied to it
+        query_kwargs = {'IndexName': 'StateIndex', 'KeyConditionExpression': Key('state').eq(states[0])}
+        state_filter = build_search_filter_expression(filters, exclude='state')
+        if state_filter is not None:
+            query_kwargs['FilterExpression'] = state_filter
         
         try:
-            response = table.query(
-                IndexName='StateIndex',
-                KeyConditionExpression=Key('state').eq(state)
-            )
-            return response.get('Items', [])
-        except ClientError:
+            if read_first:
+                window = list(islice(iter_pages(get_table().query, **first_page_limit(query_kwargs, size)), size))
+            else:
+                return select(iter_matching(iter_pages(get_table().query, **query_kwargs), predicates))
+        except ClientError as e:
             # If GSI doesn't exist, fall back to scan
+            if not is_missing_index_error(e):
+                raise
             logger.warning("StateIndex GSI not found, falling back to scan")
+        else:
+            if len(window) < size:
+                return len(window), window
+            # The index exists, so a failing count is a real error rather than a reason to scan
+            return count_pages(get_table().query, **query_kwargs), window
     
-    # Fall back to scan for complex filters
-    response = table.scan()
-    items = response['Items']
+    if read_first:
+        scan_kwargs = {} if filter_expression is None else {'FilterExpression': filter_expression}
+        window = list(islice(iter_pages(get_table().scan, **first_page_limit(scan_kwargs, size)), size))
+        if len(window) < size:
+            return len(window), window
+        return count_items(**build_client_filter(filter_expression)), window
     
-    # Continue scan if there are more items (pagination within DynamoDB)
-    while 'LastEvaluatedKey' in response:
-        response = table.scan(ExclusiveStartKey=response['LastEvaluatedKey'])
-        items.extend(response['Items'])
+    # Fall back to a parallel scan for complex filters; each segment keeps only
+    # its own selection, and the selections are then merged in segment order
+    segments = parallel_scan(lambda items: select(iter_matching(items, predicates)),
+                             **build_client_filter(filter_expression))
+    _, window = select(item for _, segment_window in segments for item in segment_window)
+    return sum(segment_total for segment_total, _ in segments), window
+
+def build_search_filter_expression(filters, exclude=None):
+    """Build a DynamoDB FilterExpression from search filters - validates against OpenAPI schema
     
-    filtered_items = items
+    Returns None when no server-side filter applies. The attribute named by
+    exclude is validated but left out, for use as a query key condition.
+    """
+    conditions = []
     
     # Array-based filters (OR logic within each array)
-    if filters.get('states'):
-        states = filters['states']
-        for state in states:
-            validate_enum(state, VALID_STATES, 'state')
-        filtered_items = [item for item in filtered_items if item.get('state') in states]
-    
-    if filters.get('policy_types'):
-        policy_types = filters['policy_types']
-        for policy_type in policy_types:
-            validate_enum(policy_type, VALID_POLICY_TYPES, 'policy_type')
-        filtered_items = [item for item in filtered_items if item.get('policy_type') in policy_types]
-    
-    if filters.get('vehicle_types'):
-        vehicle_types = filters['vehicle_types']
-        for vehicle_type in vehicle_types:
-            validate_enum(vehicle_type, VALID_VEHICLE_TYPES, 'vehicle_type')
-        filtered_items = [item for item in filtered_items if item.get('vehicle_type') in vehicle_types]
-    
-    if filters.get('policy_statuses'):
-        statuses = filters['policy_statuses']
-        for status in statuses:
-            validate_enum(status, VALID_POLICY_STATUSES, 'policy_status')
-        filtered_items = [item for item in filtered_items if item.get('policy_status') in statuses]
-    
-    if filters.get('risk_ratings'):
-        ratings = filters['risk_ratings']
-        for rating in ratings:
-            validate_enum(rating, VALID_RISK_RATINGS, 'risk_rating')
-        filtered_items = [item for item in filtered_items if item.get('risk_rating') in ratings] 
-   # Range filters
+    for filter_name, field_name, valid_values in SEARCH_ARRAY_FILTERS:
+        if filters.get(filter_name):
+            allowed = filters[filter_name]
+            for value in allowed:
+                validate_enum(value, valid_values, field_name)
+            conditions.append((field_name, Attr(field_name).is_in(list(dict.fromkeys(allowed)))))
+    
+    # Date range filters - ISO dates compare correctly as strings
+    date_range = filters.get('date_range') or {}
+    for param_name, field_name, operator in DATE_RANGE_FILTERS:
+        if date_range.get(param_name):
+            date_value = date_range[param_name]
+            validate_date(date_value, param_name)
+            
+            if operator == '>=':
+                conditions.append((field_name, Attr(field_name).gte(date_value)))
+            else:  # operator == '<='
+                conditions.append((field_name, Attr(field_name).lte(date_value)))
+    
+    # Compliance filter
+    if filters.get('compliance'):
+        compliance = filters['compliance']
+        validate_enum(compliance, VALID_COMPLIANCE_VALUES, 'compliance')
+        conditions.append(('is_compliant', Attr('is_compliant').eq(compliance)))
+    
+    filter_expression = None
+    for field_name, condition in conditions:
+        if field_name == exclude:
+            continue
+        filter_expression = condition if filter_expression is None else filter_expression & condition
+    return filter_expression
+
+def build_search_range_predicates(filters):
+    """Build item predicates for the search premium range - validates against OpenAPI schema
+    
+    Premium amounts are stored as "$1,000" strings, so the range cannot be
+    compared by DynamoDB and is checked here instead.
+    """
+    predicates = []
+    
     premium_range = filters.get('premium_range', {})
     if premium_range:
         premium_min = premium_range.get('min', 0)
@@ -839,128 +1282,138 @@ apply_advanced_filters(filters):
         validate_number(premium_min, 'premium_min', 0)
         if premium_max != float('inf'):
             validate_number(premium_max, 'premium_max', 0)
+        premium_min, premium_max = float(premium_min), float(premium_max)
         
-        def in_premium_range(item):
-            try:
-                premium = parse_currency_amount(item.get('premium_amount', 0))
-                return premium_min <= premium <= premium_max
-            except (ValueError, TypeError):
-                return False
-        
-        filtered_items = [item for item in filtered_items if in_premium_range(item)]
+        predicates.append(lambda item: currency_in_range(item.get('premium_amount', 0), premium_min, premium_max))
     
-    # Date range filters
-    date_range = filters.get('date_range', {})
-    if date_range:
-        if date_range.get('start_date_from'):
-            validate_date(date_range['start_date_from'], 'start_date_from')
-            filtered_items = [item for item in filtered_items 
-                             if item.get('start_date', '') >= date_range['start_date_from']]
-        if date_range.get('start_date_to'):
-            validate_date(date_range['start_date_to'], 'start_date_to')
-            filtered_items = [item for item in filtered_items 
-                             if item.get('start_date', '') <= date_range['start_date_to']]
-        if date_range.get('end_date_from'):
-            validate_date(date_range['end_date_from'], 'end_date_from')
-            filtered_items = [item for item in filtered_items 
-                             if item.get('end_date', '') >= date_range['end_date_from']]
-        if date_range.get('end_date_to'):
-            validate_date(date_range['end_date_to'], 'end_date_to')
-            filtered_items = [item for item in filtered_items 
-                             if item.get('end_date', '') <= date_range['end_date_to']]
+    return predicates
+
+def build_search_predicates(filters):
+    """Build item predicates for every search filter - validates against OpenAPI schema
+    
+    Used where DynamoDB cannot filter, such as items fetched by key.
+    Predicates are ordered cheapest first, so all() rejects most items with a
+    set lookup or string comparison before any currency amount is parsed.
+    """
+    predicates = []
+    
+    # Array-based filters (OR logic within each array)
+    for filter_name, field_name, valid_values in SEARCH_ARRAY_FILTERS:
+        if filters.get(filter_name):
+            allowed = filters[filter_name]
+            for value in allowed:
+                validate_enum(value, valid_values, field_name)
+            allowed = frozenset(allowed)
+            predicates.append(lambda item, field_name=field_name, allowed=allowed: item.get(field_name) in allowed)
     
     # Compliance filter
     if filters.get('compliance'):
         compliance = filters['compliance']
         validate_enum(compliance, VALID_COMPLIANCE_VALUES, 'compliance')
-        filtered_items = [item for item in filtered_items if item.get('is_compliant') == compliance]
+        predicates.append(lambda item: item.get('is_compliant') == compliance)
+    
+    # Date range filters
+    date_range = filters.get('date_range') or {}
+    for param_name, field_name, operator in DATE_RANGE_FILTERS:
+        if date_range.get(param_name):
+            date_value = date_range[param_name]
+            validate_date(date_value, param_name)
+            
+            if operator == '>=':
+                predicates.append(lambda item, field_name=field_name, date_value=date_value:
+                                  item.get(field_name, '') >= date_value)
+            else:  # operator == '<='
+                predicates.append(lambda item, field_name=field_name, date_value=date_value:
+                                  item.get(field_name, '') <= date_value)
+    
+    # Range filters last: they parse currency strings
+    predicates.extend(build_search_range_predicates(filters))
     
-    return filtered_items
+    return predicates
 
-def sort_items(items, sort_config):
-    """Sort items based on sort configuration"""
+def batch_get_policies(policy_ids):
+    """Fetch policies by ID with BatchGetItem, retrying unprocessed keys with exponential backoff"""
+    # BatchGetItem rejects requests that repeat a key
+    policy_ids = list(dict.fromkeys(policy_ids))
+    items = []
+    
+    for start in range(0, len(policy_ids), BATCH_GET_MAX_KEYS):
+        chunk = policy_ids[start:start + BATCH_GET_MAX_KEYS]
+        request_items = {table_name: {'Keys': [{'policy_id': policy_id} for policy_id in chunk]}}
+        
+        for attempt in range(BATCH_MAX_RETRIES + 1):
+            response = dynamodb.batch_get_item(RequestItems=request_items)
+            items.extend(response['Responses'].get(table_name, []))
+            request_items = response.get('UnprocessedKeys')
+            if not request_items:
+                break
+            # Throttled keys come back unprocessed; back off with full jitter before asking again
+            time.sleep(random.uniform(0, BATCH_RETRY_BASE_DELAY * 2 ** attempt))
+        else:
+            raise RuntimeError(f"BatchGetItem left keys unprocessed after {BATCH_MAX_RETRIES} retries")
+    
+    return items
+
+def get_sort_key(sort_config):
+    """Return the (key function, reverse) pair for a sort configuration, or (None, False) for no sorting"""
     field = sort_config.get('field')
     order = sort_config.get('order', 'asc')
     
     if not field:
-        return items
+        return None, False
     
     # Validate sort field
-    valid_sort_fields = ['premium_amount', 'start_date', 'end_date', 'last_updated']
-    if field not in valid_sort_fields:
+    if not isinstance(field, str) or field not in VALID_SORT_FIELDS:
         logger.warning(f"Invalid sort field: {field}. Using default order.")
-        return items
+        return None, False
     
     # Handle special case for premium_amount (convert to float)
     if field == 'premium_amount':
-        def get_sort_key(item):
+        def sort_key(item):
             try:
                 return parse_currency_amount(item.get(field, '0'))
             except (ValueError, TypeError):
                 return 0
     else:
-        def get_sort_key(item):
+        def sort_key(item):
             return item.get(field, '')
     
-    # Sort items
-    reverse = (order.lower() == 'desc')
-    return sorted(items, key=get_sort_key, reverse=reverse)def han
-dle_get_stats(query_params, headers, path):
+    return sort_key, order.lower() == 'desc'
+
+def handle_get_stats(query_params, headers, path):
     """Handle GET /items/stats - Get policy statistics matching OpenAPI StatsResponse schema"""
     try:
         # Generate cache key based on query parameters
-        cache_key = f"stats:{json.dumps(query_params, sort_keys=True)}"
-        cached_response = get_cached_item(cache_key)
-        if cached_response:
-            return cached_response
-        
-        # Get all items
-        response = table.scan()
-        items = response['Items']
+        cache_key = make_cache_key("stats", query_params)
+        cached_body = _cache.get(cache_key)
+        if cached_body is not None:
+            return {'statusCode': 200, 'headers': headers, 'body': cached_body}
         
-        # Continue scan if there are more items (pagination within DynamoDB)
-        while 'LastEvaluatedKey' in response:
-            response = table.scan(ExclusiveStartKey=response['LastEvaluatedKey'])
-            items.extend(response['Items'])
-        
-        # Calculate statistics
-        total_policies = len(items)
-        
-        # Group by parameters
-        group_by = query_params.get('group_by')
-        summary = {}
+        stats = load_stats()
+        total_policies = stats['total']
         
         # Calculate summary statistics
-        summary['by_state'] = count_by_field(items, 'state')
-        summary['by_policy_type'] = count_by_field(items, 'policy_type')
-        summary['by_vehicle_type'] = count_by_field(items, 'vehicle_type')
-        summary['by_policy_status'] = count_by_field(items, 'policy_status')
-        summary['by_risk_rating'] = count_by_field(items, 'risk_rating')
-        
-        # Calculate averages
-        premium_values = [parse_currency_amount(item.get('premium_amount', '0')) for item in items]
-        coverage_values = [parse_currency_amount(item.get('coverage_limit', '0')) for item in items]
+        summary = {
+            summary_key: dict(stats['counts'][field_name])
+            for summary_key, field_name in STATS_GROUP_FIELDS
+        }
         
+        # Calculate averages and ranges
+        amounts = stats['amounts']
         averages = {
-            'premium_amount': sum(premium_values) / len(premium_values) if premium_values else 0,
-            'coverage_limit': sum(coverage_values) / len(coverage_values) if coverage_values else 0
+            field_name: amounts[field_name]['sum'] / total_policies if total_policies else 0
+            for field_name in STATS_AMOUNT_FIELDS
         }
-        
-        # Calculate ranges
         ranges = {
-            'premium_amount': {
-                'min': min(premium_values) if premium_values else 0,
-                'max': max(premium_values) if premium_values else 0
-            },
-            'coverage_limit': {
-                'min': min(coverage_values) if coverage_values else 0,
-                'max': max(coverage_values) if coverage_values else 0
+            field_name: {
+                'min': amounts[field_name]['min'] if total_policies else 0,
+                'max': amounts[field_name]['max'] if total_policies else 0
             }
+            for field_name in STATS_AMOUNT_FIELDS
         }
         
         # Calculate compliance rate
-        compliant_count = sum(1 for item in items if item.get('is_compliant') == 'TRUE')
-        compliance_rate = (compliant_count / total_policies * 100) if total_policies > 0 else 0
+        compliance_rate = (stats['compliant'] / total_policies * 100) if total_policies > 0 else 0
         
         # Build response matching OpenAPI StatsResponse schema
         stats_response = {
@@ -971,29 +1424,194 @@ dle_get_stats(query_params, headers, path):
             'compliance_rate': round(compliance_rate, 2)
         }
         
-        response = {
-            'statusCode': 200,
-            'headers': headers,
-            'body': json.dumps(stats_response, cls=DecimalEncoder)
-        }
+        body = json_dumps(stats_response)
         
-        # Cache statistics for 60 seconds
-        set_cached_item(cache_key, response, 60)
-        return response
+        # Cache statistics for 60 seconds, or 120 if DynamoDB is unavailable; any write changes them
+        _cache.set(cache_key, body, 60, predicate={}, stale_ttl=60)
+        return {'statusCode': 200, 'headers': headers, 'body': body}
         
+    except ClientError as e:
+        # Serve recently expired statistics rather than failing while DynamoDB is throttling
+        stale_body = _cache.get_stale(cache_key)
+        if stale_body is not None:
+            logger.warning(f"DynamoDB error in handle_get_stats, serving stale statistics: {str(e)}")
+            return {'statusCode': 200, 'headers': headers, 'body': stale_body}
+        logger.error(f"DynamoDB error in handle_get_stats: {str(e)}", exc_info=True)
+        return create_error_response(500, f"Failed to retrieve statistics", "STATS_ERROR", headers, path)
     except Exception as e:
         logger.error(f"Error in handle_get_stats: {str(e)}", exc_info=True)
         return create_error_response(500, f"Failed to retrieve statistics", "STATS_ERROR", headers, path)
 
-def count_by_field(items, field):
-    """Count items grouped by a specific field"""
-    result = {}
+def aggregate_stats(items):
+    """Accumulate policy statistics over an iterable of items in a single pass"""
+    counts = {field_name: Counter() for _, field_name in STATS_GROUP_FIELDS}
+    amounts = {field_name: {'sum': 0, 'min': float('inf'), 'max': float('-inf')}
+               for field_name in STATS_AMOUNT_FIELDS}
+    total = compliant = 0
+    
     for item in items:
-        value = item.get(field, 'Unknown')
-        if value not in result:
-            result[value] = 0
-        result[value] += 1
-    return result
+        total += 1
+        for field_name, counter in counts.items():
+            counter[item.get(field_name, 'Unknown')] += 1
+        for field_name, amount in amounts.items():
+            value = parse_currency_amount(item.get(field_name, '0'))
+            amount['sum'] += value
+            if value < amount['min']:
+                amount['min'] = value
+            if value > amount['max']:
+                amount['max'] = value
+        if item.get('is_compliant') == 'TRUE':
+            compliant += 1
+    
+    return {'total': total, 'compliant': compliant, 'counts': counts, 'amounts': amounts}
+
+def merge_stats(partials):
+    """Merge statistics accumulated by aggregate_stats, in order"""
+    merged = aggregate_stats(())
+    for partial in partials:
+        merged['total'] += partial['total']
+        merged['compliant'] += partial['compliant']
+        for field_name, counter in partial['counts'].items():
+            merged['counts'][field_name].update(counter)
+        for field_name, amount in partial['amounts'].items():
+            total_amount = merged['amounts'][field_name]
+            total_amount['sum'] += amount['sum']
+            total_amount['min'] = min(total_amount['min'], amount['min'])
+            total_amount['max'] = max(total_amount['max'], amount['max'])
+    return merged
+
+def load_stats():
+    """Policy statistics from the aggregate row, rebuilt from a table scan when missing or stale"""
+    if stats_table_name:
+        row = dynamodb_client.get_item(TableName=stats_table_name, Key=STATS_KEY, ConsistentRead=True).get('Item')
+        if row and time.time() - float(row['built_at']['N']) < STATS_MAX_AGE:
+            return row_to_stats(row)
+    
+    # Aggregate each scan segment in a single pass, reading only the attributes
+    # the statistics use, then merge the segments
+    stats = merge_stats(parallel_scan(aggregate_stats, **build_projection(STATS_ATTRIBUTES, ())))
+    if stats_table_name:
+        dynamodb_client.put_item(TableName=stats_table_name, Item=stats_to_row(stats))
+    return stats
+
+def stats_to_row(stats):
+    """Serialize merged statistics as a flat aggregate row for the low-level client"""
+    row = {
+        'built_at': int(time.time()),
+        'total': stats['total'],
+        'compliant': stats['compliant']
+    }
+    for field_name, counter in stats['counts'].items():
+        for value, count in counter.items():
+            row[f"count#{field_name}#{value}"] = count
+    for field_name, amount in stats['amounts'].items():
+        row[f"sum#{field_name}"] = Decimal(str(amount['sum']))
+        if stats['total']:
+            row[f"min#{field_name}"] = Decimal(str(amount['min']))
+            row[f"max#{field_name}"] = Decimal(str(amount['max']))
+    
+    item = {name: serializer.serialize(value) for name, value in row.items()}
+    item.update(STATS_KEY)
+    return item
+
+def row_to_stats(row):
+    """Deserialize an aggregate row into the shape returned by merge_stats"""
+    row = {name: deserializer.deserialize(value) for name, value in row.items()}
+    stats = aggregate_stats(())
+    stats['total'] = int(row['total'])
+    stats['compliant'] = int(row['compliant'])
+    for name, count in row.items():
+        if name.startswith('count#') and count > 0:
+            _, field_name, value = name.split('#', 2)
+            if field_name in stats['counts']:
+                stats['counts'][field_name][value] = int(count)
+    for field_name, amount in stats['amounts'].items():
+        amount['sum'] = float(row.get(f"sum#{field_name}", 0))
+        amount['min'] = float(row.get(f"min#{field_name}", 0))
+        amount['max'] = float(row.get(f"max#{field_name}", 0))
+    return stats
+
+def record_stats_change(previous, item):
+    """Apply one policy write (previous version -> new version, None when absent) to the aggregate row
+    
+    Counts and sums are adjusted atomically with ADD. A range can only be
+    widened in place; when the write removes a value at either end of a
+    range, the row is dropped and the next stats read rebuilds it.
+    """
+    if not stats_table_name:
+        return
+    try:
+        amounts = {
+            field_name: [parse_currency_amount(policy.get(field_name, '0')) if policy else None
+                         for policy in (previous, item)]
+            for field_name in STATS_AMOUNT_FIELDS
+        }
+        
+        deltas = Counter()
+        for sign, policy in ((-1, previous), (1, item)):
+            if not policy:
+                continue
+            deltas['total'] += sign
+            deltas['compliant'] += sign * (policy.get('is_compliant') == 'TRUE')
+            for _, field_name in STATS_GROUP_FIELDS:
+                deltas[f"count#{field_name}#{policy.get(field_name, 'Unknown')}"] += sign
+        for field_name, (old_amount, new_amount) in amounts.items():
+            deltas[f"sum#{field_name}"] += (Decimal(str(new_amount)) if new_amount is not None else 0) - \
+                                          (Decimal(str(old_amount)) if old_amount is not None else 0)
+        deltas = {name: delta for name, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        
+        # Only adjust an existing row; a missing one is rebuilt by the next stats read
+        try:
+            response = dynamodb_client.update_item(
+                TableName=stats_table_name,
+                Key=STATS_KEY,
+                UpdateExpression='ADD ' + ', '.join(f"#a{i} :a{i}" for i in range(len(deltas))),
+                ConditionExpression='attribute_exists(pk)',
+                ExpressionAttributeNames={f"#a{i}": name for i, name in enumerate(deltas)},
+                ExpressionAttributeValues={f":a{i}": serializer.serialize(delta)
+                                           for i, delta in enumerate(deltas.values())},
+                ReturnValues='ALL_NEW'
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                return
+            raise
+        row = {name: deserializer.deserialize(value) for name, value in response['Attributes'].items()}
+        
+        for field_name, (old_amount, new_amount) in amounts.items():
+            if old_amount == new_amount:
+                continue
+            low, high = row.get(f"min#{field_name}"), row.get(f"max#{field_name}")
+            if old_amount is not None and (low is None or old_amount <= low or old_amount >= high):
+                dynamodb_client.delete_item(TableName=stats_table_name, Key=STATS_KEY)
+                return
+            if new_amount is not None:
+                widen_stats_range(f"min#{field_name}", '>', new_amount)
+                widen_stats_range(f"max#{field_name}", '<', new_amount)
+    except Exception as e:
+        # Never fail the write over statistics; drop the row so it is rebuilt instead
+        logger.error(f"Error updating statistics aggregate: {str(e)}", exc_info=True)
+        try:
+            dynamodb_client.delete_item(TableName=stats_table_name, Key=STATS_KEY)
+        except ClientError:
+            logger.error("Failed to drop statistics aggregate", exc_info=True)
+
+def widen_stats_range(attribute, comparison, amount):
+    """Set a range bound on the aggregate row if amount lies beyond it"""
+    try:
+        dynamodb_client.update_item(
+            TableName=stats_table_name,
+            Key=STATS_KEY,
+            UpdateExpression='SET #b = :v',
+            ConditionExpression=f"attribute_exists(pk) AND (attribute_not_exists(#b) OR #b {comparison} :v)",
+            ExpressionAttributeNames={'#b': attribute},
+            ExpressionAttributeValues={':v': serializer.serialize(Decimal(str(amount)))}
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
 
 # Configure AWS Lambda Dead Letter Queue if environment variable is set
 if os.environ.get("DLQ_ARN"):
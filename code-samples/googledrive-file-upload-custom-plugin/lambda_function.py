@@ -4,7 +4,42 @@ import json
 import boto3
 import io
 import os
-from googleapiclient.http import MediaIoBaseUpload
+import time
+from googleapiclient.http import MediaInMemoryUpload, MediaIoBaseUpload
+
+# Use orjson for request and response bodies when it is bundled with the function
+try:
+    import orjson
+    
+    def json_dumps(obj):
+        return orjson.dumps(obj).decode()
+    
+    json_loads = orjson.loads
+except ImportError:
+    json_dumps = json.dumps
+    json_loads = json.loads
+
+# Reused across warm invocations
+cognito = boto3.client('cognito-idp')
+
+# Cognito emails by (user pool, username), kept for EMAIL_CACHE_TTL seconds
+EMAIL_CACHE_TTL = 300
+_email_cache = {}
+
+# Drive API client, built on first use
+_drive_service = None
+
+# Shared drive IDs by folder ID (None for folders outside a shared drive), kept for
+# FOLDER_CACHE_TTL seconds; a folder rarely moves between drives
+FOLDER_CACHE_TTL = 300
+_folder_drive_cache = {}
+
+# Uploads below this size are sent in one request; larger ones are resumable
+SINGLE_UPLOAD_MAX_BYTES = 5 * 1024 * 1024
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Shared drive roles that can upload files
+WRITE_ROLES = frozenset(('organizer', 'fileorganizer', 'writer', 'contributor'))
 
 def get_service_account_creds():
     secret_name = os.environ.get('SECRET_NAME')
@@ -20,7 +55,7 @@ def get_service_account_creds():
         get_secret_value_response = client.get_secret_value(
             SecretId=secret_name
         )
-        creds_dict = json.loads(get_secret_value_response['SecretString'])
+        creds_dict = json_loads(get_secret_value_response['SecretString'])
         print("Successfully retrieved secret from Secrets Manager")
         credentials = service_account.Credentials.from_service_account_info(
             creds_dict,
@@ -31,35 +66,63 @@ def get_service_account_creds():
         print(f"Error getting credentials: {str(e)}")
         raise e
 
+def get_drive_service():
+    """Build the Drive client once per container; the service account credentials refresh their own tokens"""
+    global _drive_service
+    if _drive_service is None:
+        credentials = get_service_account_creds()
+        # Use the discovery document bundled with the client library instead of fetching it
+        _drive_service = build('drive', 'v3', credentials=credentials,
+                               cache_discovery=False, static_discovery=True)
+    return _drive_service
+
 def get_user_email_from_cognito(username, user_pool_id):
-    """Get user email from Cognito using the username"""
+    """Get user email from Cognito using the username, cached per warm container"""
+    cache_key = (user_pool_id, username)
+    cached = _email_cache.get(cache_key)
+    if cached and time.monotonic() - cached[1] < EMAIL_CACHE_TTL:
+        return cached[0]
+    
     try:
-        cognito = boto3.client('cognito-idp')
         response = cognito.admin_get_user(
             UserPoolId=user_pool_id,
             Username=username
         )
         
+        email = None
         for attr in response['UserAttributes']:
             if attr['Name'] == 'email':
-                return attr['Value']
+                email = attr['Value']
+                break
         
-        return None
+        if email:
+            _email_cache[cache_key] = (email, time.monotonic())
+        return email
     except Exception as e:
         print(f"Error getting user from Cognito: {str(e)}")
         raise e
 
+def get_folder_drive_id(drive_service, folder_id):
+    """Get the shared drive ID a folder belongs to, cached per warm container"""
+    cached = _folder_drive_cache.get(folder_id)
+    if cached and time.monotonic() - cached[1] < FOLDER_CACHE_TTL:
+        return cached[0]
+    
+    # Get folder info with shared drive support
+    folder = drive_service.files().get(
+        fileId=folder_id,
+        supportsAllDrives=True,
+        fields='id,driveId'
+    ).execute()
+    
+    drive_id = folder.get('driveId')
+    _folder_drive_cache[folder_id] = (drive_id, time.monotonic())
+    return drive_id
+
 def check_shared_drive_permission(drive_service, folder_id, user_email):
     """Check if user has permission to access a shared drive folder"""
     try:
-        # Get folder info with shared drive support
-        folder = drive_service.files().get(
-            fileId=folder_id,
-            supportsAllDrives=True,
-            fields='id,name,driveId,parents'
-        ).execute()
-        
-        drive_id = folder.get('driveId')
+        drive_id = get_folder_drive_id(drive_service, folder_id)
         if not drive_id:
             print("This is not a shared drive folder")
             return False
@@ -73,21 +136,21 @@ def check_shared_drive_permission(drive_service, folder_id, user_email):
             fields='permissions(emailAddress,role,type,domain)'
         ).execute()
         
+        user_domain = user_email.split('@')[1] if '@' in user_email else ''
         for permission in permissions.get('permissions', []):
             # Check domain permission
             if permission.get('type') == 'domain':
-                user_domain = user_email.split('@')[1] if '@' in user_email else ''
                 perm_domain = permission.get('domain')
                 if user_domain and perm_domain and user_domain == perm_domain:
                     role = permission.get('role', '').lower()
-                    if role in ['organizer', 'fileorganizer', 'writer', 'contributor']:
+                    if role in WRITE_ROLES:
                         print(f"User has domain {role} access to shared drive")
                         return True
             
             # Check direct user permission
             if permission.get('emailAddress') == user_email:
                 role = permission.get('role', '').lower()
-                if role in ['organizer', 'fileorganizer', 'writer', 'contributor']:
+                if role in WRITE_ROLES:
                     print(f"User has direct {role} access to shared drive")
                     return True
         
@@ -100,7 +163,8 @@ def check_shared_drive_permission(drive_service, folder_id, user_email):
 
 def lambda_handler(event, context):
     try:
-        print(f"Event: {json.dumps(event)}")
+        # Log the request without its body, which carries the whole file content
+        print(f"Event: {json_dumps({key: value for key, value in event.items() if key != 'body'})}")
         
         username = None
         user_pool_id = os.environ.get('COGNITO_USER_POOL_ID')
@@ -115,7 +179,7 @@ def lambda_handler(event, context):
         if not username:
             return {
                 'statusCode': 401,
-                'body': json.dumps({'message': 'Authentication required. No username found in request.'})
+                'body': json_dumps({'message': 'Authentication required. No username found in request.'})
             }
         try:
             user_email = get_user_email_from_cognito(username, user_pool_id)
@@ -123,24 +187,24 @@ def lambda_handler(event, context):
             print(f"Failed to retrieve user email: {str(e)}")
             return {
                 'statusCode': 500,
-                'body': json.dumps({'message': 'Failed to retrieve user information.'})
+                'body': json_dumps({'message': 'Failed to retrieve user information.'})
             }
         if not user_email:
             return {
                 'statusCode': 401,
-                'body': json.dumps({'message': 'Could not retrieve user email from Cognito.'})
+                'body': json_dumps({'message': 'Could not retrieve user email from Cognito.'})
             }
             
         print(f"Retrieved user email: {user_email}")
         
-        body = json.loads(event['body'])
+        body = json_loads(event['body'])
         file_name = body['fileName']
         folder_id = body['folderId']  # This should be a shared drive folder ID
         mime_type = body.get('mimeType', 'text/plain')
-        file_content = body['fileContent'].encode('utf-8')
+        # Encode the content and drop the decoded string so only one copy is held
+        file_content = body.pop('fileContent').encode('utf-8')
         
-        credentials = get_service_account_creds()
-        drive_service = build('drive', 'v3', credentials=credentials)
+        drive_service = get_drive_service()
         
         # Check shared drive access
         try:
@@ -149,12 +213,12 @@ def lambda_handler(event, context):
             print(f"Failed to check shared drive permissions: {str(e)}")
             return {
                 'statusCode': 500,
-                'body': json.dumps({'message': 'Failed to verify shared drive permissions.'})
+                'body': json_dumps({'message': 'Failed to verify shared drive permissions.'})
             }
         if not has_access:
             return {
                 'statusCode': 403,
-                'body': json.dumps({'message': 'Access denied. You do not have permission to upload to this shared drive folder.'})
+                'body': json_dumps({'message': 'Access denied. You do not have permission to upload to this shared drive folder.'})
             }
         
         # Upload file to shared drive
@@ -163,11 +227,16 @@ def lambda_handler(event, context):
             'parents': [folder_id]
         }
         
-        media = MediaIoBaseUpload(
-            io.BytesIO(file_content),
-            mimetype=mime_type,
-            resumable=True
-        )
+        # Small files go up in a single request; larger ones in resumable chunks
+        if len(file_content) < SINGLE_UPLOAD_MAX_BYTES:
+            media = MediaInMemoryUpload(file_content, mimetype=mime_type, resumable=False)
+        else:
+            media = MediaIoBaseUpload(
+                io.BytesIO(file_content),
+                mimetype=mime_type,
+                chunksize=UPLOAD_CHUNK_SIZE,
+                resumable=True
+            )
         
         file = drive_service.files().create(
             body=file_metadata,
@@ -178,7 +247,7 @@ def lambda_handler(event, context):
         
         return {
             'statusCode': 200,
-            'body': json.dumps({
+            'body': json_dumps({
                 'fileId': file.get('id'),
                 'webViewLink': file.get('webViewLink')
             })
@@ -188,5 +257,5 @@ def lambda_handler(event, context):
         print(f"Error: {str(e)}")
         return {
             'statusCode': 500,
-            'body': json.dumps({'error': str(e)})
+            'body': json_dumps({'error': str(e)})
         }
\ No newline at end of file